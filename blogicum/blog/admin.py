@@ -2,7 +2,7 @@ from django.contrib.admin import ModelAdmin, site
 from django.contrib.admin.decorators import register
 from django.contrib.auth.models import Group
 
-from blog.models import Category, Comment, Location, Post
+from blog.models import Category, Comment, Job, Location, Post
 
 
 @register(Location)
@@ -26,6 +26,7 @@ class PostAdmin(ModelAdmin):
         'category',
         'location',
         'is_published',
+        'comment_count',
         'created_at'
     )
     list_editable = ('is_published', 'location', 'category',)
@@ -69,3 +70,17 @@ class CommentAdmin(ModelAdmin):
 
 site.empty_value_display = '-- Не задано --'
 site.unregister(Group)
+
+
+@register(Job)
+class JobAdmin(ModelAdmin):
+    """Административная панель для очереди фоновых задач."""
+
+    list_display = (
+        'kind', 'status', 'attempts', 'created_at', 'finished_at',
+    )
+    list_filter = ('kind', 'status',)
+    readonly_fields = (
+        'kind', 'payload', 'attempts', 'last_error', 'created_at',
+        'started_at', 'heartbeat_at', 'finished_at',
+    )
@@ -5,3 +5,15 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.conf import settings
+
+        from blog import signals  # noqa: F401
+        from blog.jobs import worker
+        from blog.scheduler import scheduler
+
+        if settings.BLOG_PUBLICATION_SCHEDULER_THREAD:
+            scheduler.start()
+        if settings.BLOG_JOBS_THREAD:
+            worker.start()
@@ -0,0 +1,254 @@
+import math
+from statistics import median
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.constants import (
+    BENCHMARK_CATEGORIES,
+    BENCHMARK_LATENCY_SLACK_MS,
+    BENCHMARK_LATENCY_TOLERANCE,
+    BENCHMARK_LOCATIONS,
+    BENCHMARK_REFERENCE_LOOPS,
+    BENCHMARK_REQUESTS,
+    GENERATOR_CHUNK_SIZE,
+)
+from blog.generator import generate
+from blog.models import Comment, Post
+from blog.urls import urlpatterns as blog_urlpatterns
+from pages.urls import urlpatterns as pages_urlpatterns
+
+User = get_user_model()
+
+# Маршруты, которые имеет смысл замерять только для автора.
+AUTHOR_ONLY_ROUTES = {
+    'blog:create_post',
+    'blog:edit_post',
+    'blog:delete_post',
+    'blog:edit_profile',
+    'blog:add_comment',
+    'blog:edit_comment',
+    'blog:delete_comment',
+}
+
+
+def seed_dataset(users, posts, comments, seed=0,
+                 chunk_size=GENERATOR_CHUNK_SIZE):
+    """Заполняет пустую базу синтетическими данными для замеров."""
+    generate(
+        {
+            'users': users,
+            'categories': BENCHMARK_CATEGORIES,
+            'locations': BENCHMARK_LOCATIONS,
+            'posts': posts,
+            'comments': comments,
+        },
+        seed=seed,
+        chunk_size=chunk_size,
+    )
+
+
+def dataset_summary():
+    return {
+        'users': User.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def routes():
+    """Именованные маршруты из blog/urls.py и pages/urls.py."""
+    return [
+        (f'{namespace}:{pattern.name}', pattern)
+        for namespace, patterns in (
+            ('blog', blog_urlpatterns), ('pages', pages_urlpatterns)
+        )
+        for pattern in patterns
+    ]
+
+
+def sample_kwargs():
+    """
+    Подбирает аргументы маршрутов: видимый пост с комментарием
+    его автора, чтобы страницы редактирования открывались автору.
+    """
+    comment = (
+        Comment.objects.filter(
+            author=F('post__author'),
+            post__is_published=True,
+            post__category__is_published=True,
+            post__pub_date__lte=timezone.now(),
+        )
+        .select_related('post__author', 'post__category')
+        .order_by('pk').first()
+    )
+    if comment is None:
+        raise LookupError('Нет опубликованного поста с комментарием автора.')
+    post = comment.post
+    return post.author, {
+        'post_id': post.pk,
+        'comment_id': comment.pk,
+        'category_slug': post.category.slug,
+        'username': post.author.username,
+    }
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def reference_ms(loops=BENCHMARK_REFERENCE_LOOPS, runs=5):
+    """
+    Время фиксированной вычислительной нагрузки на этой машине.
+    Задержки маршрутов сравниваются с эталоном в его долях, поэтому
+    эталон переносится между машинами разной скорости.
+    """
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        sum(number * number for number in range(loops))
+        timings.append((perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def summarize(timings, queries):
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p90_ms': round(percentile(timings, 0.9), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': max(queries),
+    }
+
+
+def measure(client, url, requests):
+    """
+    Замеряет время и количество запросов к базе для одного URL
+    отдельно с пустым кэшем (`cold`) и с заполненным (`warm`).
+    """
+    runs = {'cold': ([], []), 'warm': ([], [])}
+    for state, (timings, queries) in runs.items():
+        if state == 'warm':
+            client.get(url)
+        for _ in range(requests):
+            if state == 'cold':
+                for store in caches.all():
+                    store.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = perf_counter()
+                response = client.get(url)
+                timings.append((perf_counter() - start) * 1000)
+            queries.append(len(captured))
+    result = {'status': response.status_code}
+    for state, (timings, queries) in runs.items():
+        result[state] = summarize(timings, queries)
+    return result
+
+
+def run_benchmarks(requests=BENCHMARK_REQUESTS):
+    """
+    Замеряет каждый маршрут анонимно и от имени автора.
+    Возвращает результаты по ключам «маршрут аудитория»
+    и время эталонной нагрузки.
+    """
+    author, kwargs = sample_kwargs()
+    clients = {'anonymous': Client(), 'author': Client()}
+    clients['author'].force_login(author)
+    results = {}
+    for name, pattern in routes():
+        url = reverse(name, kwargs={
+            key: kwargs[key] for key in pattern.pattern.converters
+        })
+        for audience, client in clients.items():
+            if audience == 'anonymous' and name in AUTHOR_ONLY_ROUTES:
+                continue
+            results[f'{name} {audience}'] = measure(client, url, requests)
+    return {
+        'dataset': dataset_summary(),
+        'reference_ms': round(reference_ms(), 3),
+        'routes': results,
+    }
+
+
+def make_baseline(results):
+    """
+    Эталон из результатов: статус, число запросов к базе и p90
+    в долях эталонной нагрузки, без машинно-зависимых миллисекунд.
+    """
+    reference = results['reference_ms']
+    return {
+        'dataset': results['dataset'],
+        'routes': {
+            route: {
+                'status': result['status'],
+                **{
+                    state: {
+                        'p90_ratio': round(
+                            result[state]['p90_ms'] / reference, 4
+                        ),
+                        'queries': result[state]['queries'],
+                    }
+                    for state in ('cold', 'warm')
+                },
+            }
+            for route, result in results['routes'].items()
+        },
+    }
+
+
+def compare(results, baseline, tolerance=BENCHMARK_LATENCY_TOLERANCE,
+            slack_ms=BENCHMARK_LATENCY_SLACK_MS):
+    """
+    Сравнивает результаты с эталоном из make_baseline. Приведённый
+    к эталонной нагрузке p90 может вырасти не больше чем на
+    `tolerance` и `slack_ms` сразу, число запросов — не расти.
+    Возвращает список описаний регрессий.
+    """
+    if results['dataset'] != baseline['dataset']:
+        return [
+            f'набор данных {results["dataset"]} не совпадает '
+            f'с эталонным {baseline["dataset"]}'
+        ]
+    reference = results['reference_ms']
+    regressions = []
+    for route, expected in baseline['routes'].items():
+        actual = results['routes'].get(route)
+        if actual is None:
+            regressions.append(f'{route}: маршрут не замерен')
+            continue
+        if actual['status'] != expected['status']:
+            regressions.append(
+                f'{route}: статус {actual["status"]}, '
+                f'эталон {expected["status"]}'
+            )
+        for state in ('cold', 'warm'):
+            regressions += compare_state(
+                f'{route} {state}', actual[state], expected[state],
+                reference, tolerance, slack_ms,
+            )
+    return regressions
+
+
+def compare_state(name, actual, expected, reference, tolerance, slack_ms):
+    regressions = []
+    expected_ms = expected['p90_ratio'] * reference
+    limit = max(expected_ms * (1 + tolerance), expected_ms + slack_ms)
+    if actual['p90_ms'] > limit:
+        regressions.append(
+            f'{name}: p90 {actual["p90_ms"]} мс, '
+            f'эталон {expected_ms:.3f} мс на этой машине'
+        )
+    if actual['queries'] > expected['queries']:
+        regressions.append(
+            f'{name}: запросов {actual["queries"]}, '
+            f'эталон {expected["queries"]}'
+        )
+    return regressions
@@ -0,0 +1,142 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .constants import BLOB_GC_BATCH_SIZE, BLOB_GC_MIN_AGE
+from blog.models import ImageBlob, Post
+
+# Служебная строка, UPDATE которой служит блокировкой счётчиков.
+# Такого имени не бывает у файлов хранилища.
+LOCK_NAME = '.lock'
+
+
+def blob_names(image, variants):
+    """Файлы, на которые ссылается пост: фото и его копии."""
+    names = {variant['name'] for variant in (variants or {}).values()}
+    if image:
+        names.add(str(image))
+    return names
+
+
+def lock_refs():
+    """
+    Блокирует счётчики до конца текущей транзакции. UPDATE служебной
+    строки блокирует её в PostgreSQL и всю базу на запись в SQLite,
+    поэтому изменения ссылок, пересчёт и сборка мусора не пересекаются.
+    """
+    lock = ImageBlob.objects.filter(name=LOCK_NAME)
+    if not lock.update(refcount=F('refcount')):
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=LOCK_NAME)], ignore_conflicts=True
+        )
+        lock.update(refcount=F('refcount'))
+
+
+def change_refs(added=(), removed=()):
+    """Увеличивает счётчики `added` и уменьшает счётчики `removed`."""
+    added, removed = set(added) - set(removed), set(removed) - set(added)
+    if not added and not removed:
+        return
+    with transaction.atomic():
+        lock_refs()
+        if added:
+            ImageBlob.objects.bulk_create(
+                [ImageBlob(name=name) for name in added],
+                ignore_conflicts=True,
+            )
+            ImageBlob.objects.filter(name__in=added).update(
+                refcount=F('refcount') + 1
+            )
+        if removed:
+            ImageBlob.objects.filter(
+                name__in=removed, refcount__gt=0
+            ).update(refcount=F('refcount') - 1)
+
+
+def recount_refs(batch_size=BLOB_GC_BATCH_SIZE):
+    """
+    Пересчитывает счётчики по постам пачками: нужен после загрузок,
+    обходящих сигналы. Весь пересчёт идёт в одной транзакции под
+    блокировкой счётчиков: сборщик мусора не увидит обнулённых
+    счётчиков, а параллельные изменения ссылок подождут.
+    Возвращает количество блобов со ссылками.
+    """
+    posts = Post.objects.exclude(image='').order_by('pk')
+    last_id = 0
+    with transaction.atomic():
+        lock_refs()
+        ImageBlob.objects.exclude(name=LOCK_NAME).update(refcount=0)
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_id)
+                .values_list('pk', 'image', 'image_variants')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            counts = Counter(
+                name for _, image, variants in batch
+                for name in blob_names(image, variants)
+            )
+            ImageBlob.objects.bulk_create(
+                [ImageBlob(name=name) for name in counts],
+                ignore_conflicts=True,
+            )
+            by_count = {}
+            for name, count in counts.items():
+                by_count.setdefault(count, []).append(name)
+            for count, names in by_count.items():
+                ImageBlob.objects.filter(name__in=names).update(
+                    refcount=F('refcount') + count
+                )
+    return ImageBlob.objects.filter(refcount__gt=0).exclude(
+        name=LOCK_NAME
+    ).count()
+
+
+def collect_garbage(path, batch_size=BLOB_GC_BATCH_SIZE,
+                    min_age=BLOB_GC_MIN_AGE, dry_run=False,
+                    storage=default_storage):
+    """
+    Обходит файлы хранилища под `path` и удаляет те, на которые
+    нет ссылок. В памяти держится одна пачка имён. Недавно записанные
+    файлы пропускаются: ссылка на них может быть ещё не сохранена.
+    Возвращает количество просмотренных и удалённых файлов.
+    """
+    cutoff = now() - timedelta(seconds=min_age)
+    seen = deleted = 0
+    batch = []
+
+    def sweep(names):
+        with transaction.atomic():
+            lock_refs()
+            referenced = set(
+                ImageBlob.objects.filter(name__in=names, refcount__gt=0)
+                .values_list('name', flat=True)
+            )
+            removed = [
+                name for name in names
+                if name not in referenced
+                and storage.get_modified_time(name) < cutoff
+            ]
+            if not dry_run:
+                for name in removed:
+                    storage.delete(name)
+                ImageBlob.objects.filter(
+                    name__in=removed, refcount=0
+                ).delete()
+        return len(removed)
+
+    for name in storage.walk(path):
+        seen += 1
+        batch.append(name)
+        if len(batch) == batch_size:
+            deleted += sweep(batch)
+            batch = []
+    if batch:
+        deleted += sweep(batch)
+    return seen, deleted
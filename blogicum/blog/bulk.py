@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connections
+from django.db.models import Index
+
+from blog.blobs import recount_refs
+from blog.cache import invalidate_all_feed_counts, invalidate_all_pages
+from blog.counters import recount_comments
+from blog.models import FeedEntry
+
+
+def deferrable_indexes(model, connection):
+    """
+    Неуникальные индексы модели: из Meta.indexes и индексы внешних
+    ключей. Уникальные ограничения остаются — на них опирается вставка.
+    Индексы полей описываются как Index с именем из базы, чтобы
+    удалить и создать их заново тем же способом, что и Meta.indexes.
+    """
+    indexes = list(model._meta.indexes)
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    for field in model._meta.local_concrete_fields:
+        if not field.db_index or field.unique:
+            continue
+        indexes += [
+            Index(fields=[field.name], name=name)
+            for name, info in constraints.items()
+            if info['index'] and not info['unique']
+            and info['columns'] == [field.column]
+        ]
+    return indexes
+
+
+@contextmanager
+def deferred_indexes(models, using='default'):
+    """
+    Удаляет неуникальные индексы моделей на время массовой загрузки
+    и создаёт их заново после неё, в том числе при ошибке.
+    """
+    connection = connections[using]
+    dropped = [
+        (model, index) for model in models
+        for index in deferrable_indexes(model, connection)
+    ]
+    with connection.schema_editor() as editor:
+        for model, index in dropped:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in dropped:
+                editor.add_index(model, index)
+
+
+def finish_bulk_load(models, batch_size, using='default'):
+    """
+    Доделывает то, что при обычном сохранении делают сигналы:
+    сбрасывает последовательности id, пересчитывает счётчики
+    комментариев и ссылок на изображения, перестраивает ленту
+    и сбрасывает кэш лент и страниц.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), list(models)
+        ):
+            cursor.execute(sql)
+    recount_comments(batch_size)
+    recount_refs(batch_size)
+    FeedEntry.objects.refresh_where(batch_size)
+    invalidate_all_feed_counts()
+    invalidate_all_pages()
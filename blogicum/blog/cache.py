@@ -0,0 +1,264 @@
+from functools import wraps
+from hashlib import md5
+from time import time_ns
+from urllib.parse import urlencode
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+from django.utils.timezone import now
+
+from .constants import (
+    FEED_COUNT_CACHE_TIMEOUT,
+    PAGE_CACHE_QUERY_PARAMS,
+    PAGE_CACHE_TIMEOUT,
+)
+from blog.models import Category, Post, User
+
+INDEX_FEED = 'index'
+CATEGORY_FEED = 'category'
+AUTHOR_FEED = 'author'
+AUTHOR_ALL_FEED = 'author-all'
+POST_PAGE = 'post'
+
+FEED_VERSION_KEY = 'blog:feed-version'
+FEED_COUNT_KEY = 'blog:feed-count:{version}:{feed}:{pk}'
+
+PAGE_TAG_KEY = 'blog:page-tag:{tag}'
+PAGES_RESET_KEY = 'blog:pages-reset'
+PAGE_KEY = 'blog:page:{tag}:{version}:{path}'
+PAGE_CACHE_STAT_KEY = 'blog:page-cache:{stat}'
+PAGE_CACHE_HITS = 'hits'
+PAGE_CACHE_MISSES = 'misses'
+
+# Версии меток и лент хранятся отдельно от тел страниц: вытеснение
+# версии из переполненного кэша оживило бы сброшенные страницы.
+version_cache = ConnectionProxy(caches, 'versions')
+
+
+def invalidate_on_commit(func):
+    """
+    Сбрасывает кэш сразу и ещё раз после коммита текущей транзакции:
+    конкурентный запрос мог прочитать ещё не закоммиченные изменения
+    как старые строки и закэшировать их под уже новой версией.
+    """
+    func()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(func)
+
+
+def delete_on_commit(keys, store=cache):
+    """Удаляет ключи из кэша `store` сразу и после коммита транзакции."""
+    keys = list(keys)
+    invalidate_on_commit(lambda: store.delete_many(keys))
+
+
+def feed_version():
+    """Возвращает текущую версию всех кэшированных счётчиков лент."""
+    return version_cache.get_or_set(FEED_VERSION_KEY, time_ns, None)
+
+
+def feed_count_key(feed, pk=''):
+    """Возвращает ключ кэша для количества постов в ленте."""
+    return FEED_COUNT_KEY.format(version=feed_version(), feed=feed, pk=pk)
+
+
+def feed_count_timeout(timeout=FEED_COUNT_CACHE_TIMEOUT):
+    """
+    Возвращает время жизни кэша ленты в секундах:
+    он должен истечь не позже ближайшей отложенной публикации,
+    даже если планировщик публикаций не запущен.
+    """
+    next_date = Post.postobj.get_next_publication_date()
+    if next_date is None:
+        return timeout
+    seconds = (next_date - now()).total_seconds()
+    return max(1, min(timeout, int(seconds) + 1))
+
+
+def invalidate_feed_counts(category_ids=(), author_ids=()):
+    """Сбрасывает счётчики главной ленты, категорий и авторов."""
+    keys = [feed_count_key(INDEX_FEED)]
+    keys += [feed_count_key(CATEGORY_FEED, pk) for pk in category_ids if pk]
+    for pk in author_ids:
+        keys += [
+            feed_count_key(AUTHOR_FEED, pk),
+            feed_count_key(AUTHOR_ALL_FEED, pk),
+        ]
+    delete_on_commit(keys)
+
+
+def invalidate_all_feed_counts():
+    """
+    Сбрасывает все счётчики лент сразу сменой версии ключей.
+    Нужен, когда изменение затрагивает неизвестный набор авторов.
+    """
+    def bump():
+        try:
+            version_cache.incr(FEED_VERSION_KEY)
+        except ValueError:
+            version_cache.set(FEED_VERSION_KEY, time_ns(), None)
+    invalidate_on_commit(bump)
+
+
+def page_tag(feed, value=''):
+    """Возвращает метку кэшированных страниц ленты."""
+    return f'{feed}:{value}'
+
+
+def page_tag_version(tag):
+    """
+    Возвращает версию метки страниц — момент её последнего сброса
+    или сброса всех страниц сразу в наносекундах.
+    """
+    key = PAGE_TAG_KEY.format(tag=tag)
+    versions = version_cache.get_many([key, PAGES_RESET_KEY])
+    version = versions.get(key)
+    if version is None:
+        version = version_cache.get_or_set(key, time_ns, None)
+    return max(version, versions.get(PAGES_RESET_KEY, 0))
+
+
+def invalidate_all_pages():
+    """
+    Сбрасывает все кэшированные страницы, например после массовой
+    загрузки. Обычные изменения сбрасывают только свои метки.
+    """
+    invalidate_on_commit(
+        lambda: version_cache.set(PAGES_RESET_KEY, time_ns(), None)
+    )
+
+
+def page_cache_key(tag, path, variant=''):
+    """
+    Возвращает ключ страницы. В ключ входит версия метки, поэтому
+    её сброс делает страницы недоступными.
+    `variant` отличает версии содержимого с одним адресом.
+    """
+    return PAGE_KEY.format(
+        tag=tag,
+        version=page_tag_version(tag),
+        path=md5(f'{variant}:{path}'.encode()).hexdigest(),
+    )
+
+
+def page_cache_path(request):
+    """
+    Адрес страницы для ключа кэша: путь и параметры пагинации
+    в постоянном порядке. Возвращает None, если в запросе есть другие
+    параметры: иначе произвольные строки запроса заполняли бы кэш.
+    """
+    if set(request.GET) - set(PAGE_CACHE_QUERY_PARAMS):
+        return None
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    return f'{request.path}?{query}' if query else request.path
+
+
+def count_page_cache(stat):
+    """Увеличивает счётчик попаданий или промахов кэша страниц."""
+    key = PAGE_CACHE_STAT_KEY.format(stat=stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def page_cache_stats():
+    """Возвращает счётчики попаданий и промахов кэша страниц."""
+    stats = (PAGE_CACHE_HITS, PAGE_CACHE_MISSES)
+    values = cache.get_many(
+        [PAGE_CACHE_STAT_KEY.format(stat=stat) for stat in stats]
+    )
+    return {
+        stat: values.get(PAGE_CACHE_STAT_KEY.format(stat=stat), 0)
+        for stat in stats
+    }
+
+
+def invalidate_pages(category_slugs=(), usernames=()):
+    """Сбрасывает страницы главной ленты, категорий и профилей."""
+    tags = [page_tag(INDEX_FEED)]
+    tags += [page_tag(CATEGORY_FEED, slug) for slug in category_slugs]
+    tags += [page_tag(AUTHOR_FEED, username) for username in usernames]
+    delete_on_commit(
+        [PAGE_TAG_KEY.format(tag=tag) for tag in tags], version_cache
+    )
+
+
+def invalidate_post_pages(post_ids):
+    """Сбрасывает страницы постов, например при смене имени комментатора."""
+    delete_on_commit([
+        PAGE_TAG_KEY.format(tag=page_tag(POST_PAGE, pk)) for pk in post_ids
+    ], version_cache)
+
+
+def invalidate_feed_pages(category_ids=(), author_ids=()):
+    """Сбрасывает страницы лент категорий и авторов по их id."""
+    invalidate_pages(
+        Category.objects.filter(pk__in=category_ids)
+        .values_list('slug', flat=True),
+        User.objects.filter(pk__in=author_ids)
+        .values_list('username', flat=True),
+    )
+
+
+def invalidate_feeds(category_ids=(), author_ids=()):
+    """Сбрасывает счётчики и страницы лент категорий и авторов."""
+    category_ids = {pk for pk in category_ids if pk}
+    author_ids = {pk for pk in author_ids if pk}
+    invalidate_feed_counts(category_ids, author_ids)
+    invalidate_feed_pages(category_ids, author_ids)
+
+
+def cache_shared_page(get_tag, get_variant=lambda request, **kwargs: '',
+                      scheduled=True):
+    """
+    Кэширует страницу для GET-запросов одну на всех пользователей:
+    зависящие от пользователя части страницы — фрагменты, которые
+    FragmentMiddleware подставляет уже после кэша.
+    `get_tag` получает именованные аргументы представления
+    и возвращает метку, по которой страница сбрасывается.
+    `get_variant` получает запрос и аргументы и возвращает версию
+    содержимого или None, если страницу кэшировать нельзя.
+    `scheduled` — страница меняется при отложенной публикации,
+    и кэш должен истечь к её наступлению. Запросы с параметрами
+    кроме PAGE_CACHE_QUERY_PARAMS не кэшируются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            path = variant = None
+            if request.method == 'GET':
+                path = page_cache_path(request)
+            if path is not None:
+                variant = get_variant(request, **kwargs)
+            if variant is None:
+                return view(request, *args, **kwargs)
+            key = page_cache_key(get_tag(**kwargs), path, variant)
+            response = cache.get(key)
+            if response is not None:
+                count_page_cache(PAGE_CACHE_HITS)
+                return response
+            count_page_cache(PAGE_CACHE_MISSES)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                timeout = PAGE_CACHE_TIMEOUT
+                if scheduled:
+                    timeout = feed_count_timeout(timeout)
+                cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_anonymous_page(get_tag):
+    """
+    Кэширует страницу только для анонимных пользователей: для страниц,
+    тело которых зависит от зрителя, например профиля.
+    """
+    return cache_shared_page(
+        get_tag,
+        lambda request, **kwargs: (
+            None if request.user.is_authenticated else ''
+        ),
+    )
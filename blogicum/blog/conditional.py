@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+from functools import wraps
+from hashlib import md5
+
+from django.utils.timezone import now
+from django.views.decorators.http import condition
+
+from .cache import POST_PAGE, page_tag, page_tag_version
+from blog.models import Post
+
+
+def memoize_on_request(func):
+    """
+    Вычисляет значение один раз за запрос:
+    `condition` вызывает функции ETag и Last-Modified по отдельности.
+    """
+    attr = f'_{func.__name__}_result'
+
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, attr):
+            setattr(request, attr, func(request, *args, **kwargs))
+        return getattr(request, attr)
+    return wrapper
+
+
+def make_etag(request, *values):
+    """Хэширует значения вместе с адресом и зрителем страницы."""
+    user = request.user
+    return md5(repr((
+        request.get_full_path(), user.pk, user.get_username(), values
+    )).encode()).hexdigest()
+
+
+@memoize_on_request
+def post_detail_row(request, post_id):
+    """Читает поля, от которых зависит страница поста, одним запросом."""
+    return Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'category__updated_at', 'location__updated_at',
+        'is_published', 'category__is_published', 'pub_date',
+        'author__username',
+    ).first()
+
+
+@memoize_on_request
+def post_detail_state(request, post_id):
+    """
+    Возвращает (ETag, Last-Modified) страницы поста одним
+    запросом к базе, без загрузки комментариев и рендеринга.
+    В ETag входит версия метки страницы: её сброс, например при смене
+    имени комментатора, меняет ETag без изменения самого поста.
+    """
+    row = post_detail_row(request, post_id)
+    if row is None:
+        return None, None
+    last_modified = max(date for date in row[:3] if date is not None)
+    version = page_tag_version(page_tag(POST_PAGE, post_id))
+    return make_etag(request, *row, version), last_modified
+
+
+def post_detail_variant(request, post_id):
+    """
+    Версия страницы поста для общего кэша. Для поста, который видит
+    только автор, возвращает None: такую страницу не кэшируем.
+    """
+    row = post_detail_row(request, post_id)
+    if row is None:
+        return None
+    is_published, category_is_published, pub_date = row[3:6]
+    if not (is_published and category_is_published and pub_date <= now()):
+        return None
+    return md5(repr(row).encode()).hexdigest()
+
+
+def post_detail_condition(view):
+    """Отвечает 304 на повторный запрос неизменившейся страницы поста."""
+    return condition(
+        etag_func=lambda request, post_id: post_detail_state(
+            request, post_id)[0],
+        last_modified_func=lambda request, post_id: post_detail_state(
+            request, post_id)[1],
+    )(view)
+
+
+def feed_condition(get_tag, get_queryset):
+    """
+    Отвечает 304 на повторный запрос неизменившейся ленты.
+    Версия метки страниц меняется при любом изменении ленты,
+    а дата последней видимой публикации — при наступлении
+    отложенной публикации.
+    """
+    @memoize_on_request
+    def feed_state(request, **kwargs):
+        version = page_tag_version(get_tag(**kwargs))
+        latest = get_queryset(request, **kwargs).order_by(
+            '-pub_date'
+        ).values_list('pub_date', flat=True).first()
+        last_modified = datetime.fromtimestamp(version / 10**9, timezone.utc)
+        if latest is not None:
+            last_modified = max(last_modified, latest)
+        return make_etag(request, version, latest), last_modified
+
+    def decorator(view):
+        return condition(
+            etag_func=lambda request, **kwargs: feed_state(
+                request, **kwargs)[0],
+            last_modified_func=lambda request, **kwargs: feed_state(
+                request, **kwargs)[1],
+        )(view)
+    return decorator
@@ -5,3 +5,112 @@ LENGTH_COMMENT_FIELD = 30
 WINDOW_COMMENT_SIZE = 3
 
 POSTS_PER_PAGE = 10
+
+CURSOR_SEPARATOR = '|'
+
+RECOUNT_BATCH_SIZE = 1000
+
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+
+PAGINATOR_ON_EACH_SIDE = 2
+
+PAGINATOR_ON_ENDS = 1
+
+EXCERPT_WORDS = 10
+
+FEED_REFRESH_BATCH_SIZE = 500
+
+SCHEDULER_MAX_SLEEP = 30
+
+SCHEDULER_LAST_FIRED_KEY = 'blog:scheduler:last-fired'
+
+PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Параметры запроса, от которых зависит кэшированная страница.
+PAGE_CACHE_QUERY_PARAMS = ('page', 'after', 'before')
+
+COMMENTS_PER_PAGE = 20
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+BENCHMARK_CATEGORIES = 20
+
+BENCHMARK_LOCATIONS = 50
+
+BENCHMARK_REQUESTS = 30
+
+BENCHMARK_LATENCY_TOLERANCE = 0.25
+
+BENCHMARK_LATENCY_SLACK_MS = 5
+
+# Объём эталонной вычислительной нагрузки: задержки маршрутов
+# хранятся в эталоне в долях её времени, а не в миллисекундах.
+BENCHMARK_REFERENCE_LOOPS = 200_000
+
+GENERATOR_CHUNK_SIZE = 5000
+
+GENERATOR_LOCALE = 'ru_RU'
+
+IMPORT_BATCH_SIZE = 2000
+
+IMPORT_READ_SIZE = 64 * 1024
+
+EXPORT_CHUNK_SIZE = 2000
+
+IMAGE_VARIANTS = (
+    ('card', 640),
+    ('detail', 1280),
+    ('full', 2560),
+)
+
+IMAGE_VARIANTS_DIR = 'blog_images/variants'
+
+IMAGE_WEBP_QUALITY = 80
+
+IMAGE_BACKFILL_BATCH_SIZE = 100
+
+PROCESS_IMAGE_JOB = 'process_post_image'
+
+JOB_MAX_ATTEMPTS = 3
+
+JOB_RETRY_DELAY = 30
+
+# Воркер обновляет пульс выполняемых задач с этим интервалом; задача
+# без пульса дольше JOB_HEARTBEAT_TIMEOUT считается брошенной.
+JOB_HEARTBEAT_INTERVAL = 30
+
+JOB_HEARTBEAT_TIMEOUT = 3 * JOB_HEARTBEAT_INTERVAL
+
+JOB_WORKERS = 2
+
+JOB_MAX_SLEEP = 5
+
+BLOB_GC_BATCH_SIZE = 1000
+
+BLOB_GC_MIN_AGE = 60 * 60
+
+MEDIA_MAX_AGE = 60 * 60
+
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+MEDIA_BLOCK_SIZE = 64 * 1024
+
+# Порядок задаёт предпочтение, если клиент принимает оба варианта.
+STATIC_ENCODINGS = (
+    ('br', '.br'),
+    ('gzip', '.gz'),
+)
+
+STATIC_COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.xml',
+)
+
+STATIC_COMPRESS_MIN_SIZE = 256
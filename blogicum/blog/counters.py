@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.constants import RECOUNT_BATCH_SIZE
+from blog.models import Comment, Post
+
+
+def actual_comment_count():
+    """Подзапрос с фактическим количеством комментариев поста."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by().values('post')
+            .annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_comments(batch_size=RECOUNT_BATCH_SIZE):
+    """
+    Пересчитывает поле `comment_count` пачками по диапазонам id.
+    Возвращает количество исправленных постов.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Post.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return fixed
+        last_id = ids[-1]
+        with transaction.atomic():
+            stale = (
+                Post.objects.filter(pk__in=ids)
+                .annotate(actual=actual_comment_count())
+                .exclude(comment_count=F('actual'))
+                .values_list('pk', flat=True)
+            )
+            fixed += Post.objects.filter(pk__in=list(stale)).update(
+                comment_count=actual_comment_count()
+            )
+
+
+def recount_post_comments(post_id):
+    """
+    Пересчитывает счётчик одного поста. Нужен после загрузки фикстур:
+    она не вызывает обычных сигналов, а комментарии в фикстуре могут
+    идти и до поста, и после него.
+    """
+    return Post.objects.filter(pk=post_id).update(
+        comment_count=actual_comment_count()
+    )
@@ -0,0 +1,141 @@
+import re
+from inspect import signature
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import never_cache
+
+from .forms import CommentForm
+
+PLACEHOLDER = '<!--fragment:{name}?{query}-->'
+PLACEHOLDER_PATTERN = re.compile(r'<!--fragment:([\w-]+)\?([^>]*?)-->')
+
+fragments = {}
+
+
+def fragment(name, template):
+    """
+    Регистрирует фрагмент страницы, зависящий от пользователя.
+    Функция получает запрос и параметры метки и возвращает контекст
+    шаблона или None, если пользователю показывать нечего.
+    """
+    def decorator(func):
+        fragments[name] = (template, func)
+        return func
+    return decorator
+
+
+def placeholder(name, **params):
+    """Метка на месте фрагмента в общем для всех теле страницы."""
+    return mark_safe(
+        PLACEHOLDER.format(name=name, query=urlencode(params))
+    )
+
+
+def render_fragment(request, name, params):
+    """Рендерит фрагмент `name` для пользователя запроса."""
+    template, get_context = fragments[name]
+    context = get_context(request, **params)
+    if context is None:
+        return ''
+    return render_to_string(template, context, request)
+
+
+def esi_include(name, query):
+    """Тег ESI, которым фрагмент заполнит пограничный кэш."""
+    src = reverse('fragment', args=[name])
+    if query:
+        src = f'{src}?{query}'
+    return f'<esi:include src="{escape(src)}"/>'
+
+
+def fill_fragments(request, html):
+    """
+    Заменяет метки фрагментов на их HTML для текущего пользователя,
+    а при BLOG_FRAGMENTS_ESI — на теги ESI.
+    """
+    def replace(match):
+        name, query = match.groups()
+        if settings.BLOG_FRAGMENTS_ESI:
+            return esi_include(name, query)
+        return render_fragment(request, name, dict(parse_qsl(query)))
+    return PLACEHOLDER_PATTERN.sub(replace, html)
+
+
+class FragmentMiddleware:
+    """
+    Заполняет метки фрагментов в HTML-ответах. Благодаря этому тело
+    страницы не зависит от пользователя и кэшируется одно на всех,
+    а имя пользователя, ссылки автора и CSRF-токен подставляются
+    в каждый ответ отдельно.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or not response.get('Content-Type', '').startswith('text/html')
+            or b'<!--fragment:' not in response.content
+        ):
+            return response
+        html = response.content.decode(response.charset)
+        response.content = fill_fragments(request, html)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+        if settings.BLOG_FRAGMENTS_ESI:
+            response['Surrogate-Control'] = 'content="ESI/1.0"'
+        return response
+
+
+@never_cache
+def fragment_view(request, name):
+    """
+    Отдаёт один фрагмент для текущего пользователя: его запрашивает
+    пограничный кэш по тегу ESI или скрипт страницы.
+    """
+    if name not in fragments:
+        raise Http404
+    params = request.GET.dict()
+    try:
+        signature(fragments[name][1]).bind(request, **params)
+    except TypeError:
+        raise Http404
+    return HttpResponse(render_fragment(request, name, params))
+
+
+def is_author(request, author):
+    return str(request.user.pk) == str(author)
+
+
+@fragment('header', 'includes/user_nav.html')
+def user_nav(request):
+    return {}
+
+
+@fragment('comment_form', 'includes/comment_form.html')
+def comment_form(request, post):
+    if request.user.is_authenticated:
+        return {'post_id': post, 'form': CommentForm()}
+    return None
+
+
+@fragment('post_actions', 'includes/post_actions.html')
+def post_actions(request, post, author):
+    if is_author(request, author):
+        return {'post_id': post}
+    return None
+
+
+@fragment('comment_actions', 'includes/comment_actions.html')
+def comment_actions(request, post, comment, author):
+    if is_author(request, author):
+        return {'post_id': post, 'comment_id': comment}
+    return None
@@ -0,0 +1,189 @@
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from blog.bulk import finish_bulk_load
+from blog.constants import GENERATOR_CHUNK_SIZE, GENERATOR_LOCALE
+from blog.models import Category, Comment, Location, Post
+from blog.utils import setup_worker_process
+
+User = get_user_model()
+
+# Порядок важен: каждая модель ссылается только на предыдущие.
+MODELS = {
+    'users': User,
+    'categories': Category,
+    'locations': Location,
+    'posts': Post,
+    'comments': Comment,
+}
+
+
+def chunk_random(seed, kind, start):
+    """
+    Генераторы случайных значений для пачки. Зависят только от зерна
+    и начала пачки, поэтому данные не меняются от числа процессов.
+    """
+    chunk_seed = zlib.crc32(f'{seed}:{kind}:{start}'.encode())
+    fake = Faker(GENERATOR_LOCALE)
+    fake.seed_instance(chunk_seed)
+    return fake, Random(chunk_seed)
+
+
+def build_users(plan, numbers, fake, rng):
+    password = make_password(None)
+    first_id = plan['first_id']['users']
+    return [
+        User(
+            pk=first_id + number,
+            username=f'{fake.user_name()}_{first_id + number}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            email=fake.email(),
+            password=password,
+        )
+        for number in numbers
+    ]
+
+
+def build_categories(plan, numbers, fake, rng):
+    return [
+        Category(
+            pk=plan['first_id']['categories'] + number,
+            title=fake.sentence(nb_words=2).rstrip('.'),
+            description=fake.paragraph(),
+            slug=f'category-{plan["first_id"]["categories"] + number}',
+            is_published=rng.random() >= plan['unpublished'],
+        )
+        for number in numbers
+    ]
+
+
+def build_locations(plan, numbers, fake, rng):
+    return [
+        Location(
+            pk=plan['first_id']['locations'] + number,
+            name=fake.city(),
+            is_published=rng.random() >= plan['unpublished'],
+        )
+        for number in numbers
+    ]
+
+
+def pick_id(plan, kind, rng):
+    if not plan['counts'][kind]:
+        return None
+    return plan['first_id'][kind] + rng.randrange(plan['counts'][kind])
+
+
+def build_posts(plan, numbers, fake, rng):
+    now = plan['now']
+    posts = []
+    for number in numbers:
+        if rng.random() < plan['future']:
+            pub_date = now + timedelta(minutes=rng.randrange(1, 60 * 24 * 30))
+        else:
+            pub_date = now - timedelta(minutes=rng.randrange(60 * 24 * 730))
+        posts.append(Post(
+            pk=plan['first_id']['posts'] + number,
+            title=fake.sentence(nb_words=5).rstrip('.'),
+            text='\n\n'.join(fake.paragraphs(nb=rng.randint(1, 4))),
+            pub_date=pub_date,
+            author_id=pick_id(plan, 'users', rng),
+            category_id=pick_id(plan, 'categories', rng),
+            location_id=(
+                pick_id(plan, 'locations', rng)
+                if rng.random() < 0.8 else None
+            ),
+            is_published=rng.random() >= plan['unpublished'],
+        ))
+    return posts
+
+
+def build_comments(plan, numbers, fake, rng):
+    return [
+        Comment(
+            pk=plan['first_id']['comments'] + number,
+            post_id=pick_id(plan, 'posts', rng),
+            author_id=pick_id(plan, 'users', rng),
+            text=fake.sentence(nb_words=rng.randint(3, 20)),
+            is_published=rng.random() >= plan['unpublished'],
+        )
+        for number in numbers
+    ]
+
+
+BUILDERS = {
+    'users': build_users,
+    'categories': build_categories,
+    'locations': build_locations,
+    'posts': build_posts,
+    'comments': build_comments,
+}
+
+
+def generate_chunk(plan, kind, start, stop):
+    """Создаёт объекты с номерами из [start, stop) в одной транзакции."""
+    fake, rng = chunk_random(plan['seed'], kind, start)
+    objects = BUILDERS[kind](plan, range(start, stop), fake, rng)
+    with transaction.atomic():
+        MODELS[kind].objects.bulk_create(objects)
+    return stop - start
+
+
+def make_plan(counts, seed, unpublished=0.1, future=0.05):
+    """
+    Описание генерации: количество объектов и первый id каждой
+    модели. Каждая пачка получает свой непересекающийся диапазон id.
+    """
+    return {
+        'counts': counts,
+        'seed': seed,
+        'unpublished': unpublished,
+        'future': future,
+        'now': timezone.now(),
+        'first_id': {
+            kind: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for kind, model in MODELS.items()
+        },
+    }
+
+
+def generate(counts, seed=0, chunk_size=GENERATOR_CHUNK_SIZE, workers=1,
+             progress=None):
+    """
+    Генерирует данные пачками по `chunk_size`. При `workers` > 1 пачки
+    одной модели пишутся параллельными процессами. `bulk_create`
+    не вызывает сигналы, поэтому в конце выполняется finish_bulk_load.
+    """
+    plan = make_plan(counts, seed)
+    executor = None
+    if workers > 1:
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            workers, initializer=setup_worker_process
+        )
+    try:
+        for kind in MODELS:
+            chunks = [
+                (plan, kind, start, min(start + chunk_size, counts[kind]))
+                for start in range(0, counts[kind], chunk_size)
+            ]
+            if executor is None:
+                done = [generate_chunk(*chunk) for chunk in chunks]
+            else:
+                done = list(executor.map(generate_chunk, *zip(*chunks)))
+            if progress:
+                progress(kind, sum(done))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    finish_bulk_load(MODELS.values(), chunk_size)
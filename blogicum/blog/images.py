@@ -0,0 +1,77 @@
+from hashlib import md5
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_VARIANTS, IMAGE_VARIANTS_DIR, IMAGE_WEBP_QUALITY
+
+
+def fit_width(size, max_width):
+    """Размер, вписанный в ширину `max_width`, без увеличения."""
+    width, height = size
+    if width <= max_width:
+        return size
+    return max_width, max(1, round(height * max_width / width))
+
+
+def render_variants(source, storage=default_storage):
+    """
+    Сохраняет уменьшенные копии изображения в WebP и возвращает
+    их имена и размеры по видам. Имена строятся от хэша исходного
+    файла; одинаковые по размеру варианты ссылаются на один файл.
+    """
+    source.open('rb')
+    source.seek(0)
+    content = source.read()
+    digest = md5(content).hexdigest()
+    variants = {}
+    previous = None
+    with Image.open(BytesIO(content)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert(
+                'RGBA' if 'A' in image.getbands()
+                or 'transparency' in image.info else 'RGB'
+            )
+        for kind, max_width in IMAGE_VARIANTS:
+            size = fit_width(image.size, max_width)
+            if previous and (previous['width'], previous['height']) == size:
+                variants[kind] = previous
+                continue
+            buffer = BytesIO()
+            image.resize(size, Image.Resampling.LANCZOS).save(
+                buffer, 'WEBP', quality=IMAGE_WEBP_QUALITY
+            )
+            name = storage.save(
+                f'{IMAGE_VARIANTS_DIR}/{digest}-{kind}.webp',
+                ContentFile(buffer.getvalue()),
+            )
+            previous = variants[kind] = {
+                'name': name, 'width': size[0], 'height': size[1],
+            }
+    return variants
+
+
+class ImageVariantsMixin:
+    """
+    Доступ к вариантам изображения из шаблонов: `variants.card.url`,
+    `variants.card.width` и т. д., а также значение для srcset.
+    """
+
+    @property
+    def variants(self):
+        return {
+            kind: {**variant, 'url': default_storage.url(variant['name'])}
+            for kind, variant in self.image_variants.items()
+        }
+
+    @property
+    def image_srcset(self):
+        widths = {}
+        for variant in self.variants.values():
+            widths.setdefault(variant['width'], variant['url'])
+        return ', '.join(
+            f'{url} {width}w' for width, url in sorted(widths.items())
+        )
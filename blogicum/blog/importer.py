@@ -0,0 +1,224 @@
+import json
+import re
+from collections import Counter
+
+from django.apps import apps
+from django.core.serializers.python import Deserializer
+from django.db import connections, transaction
+from django.utils import timezone
+
+from blog.bulk import deferred_indexes, finish_bulk_load
+from blog.constants import IMPORT_BATCH_SIZE, IMPORT_READ_SIZE
+from blog.models import Category, Comment, Location, Post
+
+SEPARATORS = re.compile(r'[\s,]*')
+
+# Модели, индексы которых откладываются до конца загрузки.
+INDEXED_MODELS = (Category, Location, Post, Comment)
+
+
+def iter_json_array(stream, read_size=IMPORT_READ_SIZE):
+    """
+    Читает JSON-массив объектов по одному, не загружая файл целиком:
+    в памяти держится только текущий объект и непрочитанный хвост.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof, started = '', 0, False, False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                raise ValueError('Неожиданный конец JSON-массива.')
+            buffer, position = stream.read(read_size), 0
+            eof = not buffer
+            continue
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError('Ожидался JSON-массив объектов.')
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield obj
+        buffer, position = buffer[position:], 0
+
+
+def iter_ndjson(stream):
+    """Читает NDJSON: один объект на строку, пустые строки пропускаются."""
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def dependencies(model):
+    """Модели, на которые ссылается `model`, включая транзитивные."""
+    seen = []
+    pending = [model]
+    while pending:
+        for field in pending.pop()._meta.concrete_fields:
+            related = field.related_model
+            if field.many_to_one or field.one_to_one:
+                if related is not model and related not in seen:
+                    seen.append(related)
+                    pending.append(related)
+    return seen
+
+
+def fill_updated_at(objects):
+    """
+    Старые дампы не содержат `updated_at`: время изменения берётся
+    из времени создания, а не из значения поля по умолчанию.
+    """
+    for data in objects:
+        fields = data.get('fields', {})
+        if 'updated_at' not in fields and 'created_at' in fields:
+            model = apps.get_model(data['model'])
+            if any(
+                field.name == 'updated_at'
+                for field in model._meta.concrete_fields
+            ):
+                fields['updated_at'] = fields['created_at']
+        yield data
+
+
+def split_deletions(objects, deletions):
+    """
+    Отметки об удалениях из инкрементальной выгрузки откладываются
+    в `deletions` по моделям, остальные объекты идут дальше.
+    """
+    for data in objects:
+        if data.get('deleted'):
+            deletions.setdefault(data['model'], set()).add(data['pk'])
+        else:
+            yield data
+
+
+def apply_deletions(deletions, batch_size, using):
+    """
+    Удаляет отмеченные объекты: дети раньше родителей, с каскадом
+    и сигналами, как при обычном удалении.
+    Возвращает количество удалённых объектов по моделям.
+    """
+    counts = Counter()
+    models = [apps.get_model(label) for label in deletions]
+    models.sort(key=lambda model: len(dependencies(model)), reverse=True)
+    for model in models:
+        pks = sorted(deletions[model._meta.label_lower])
+        manager = model._base_manager.db_manager(using)
+        for start in range(0, len(pks), batch_size):
+            _, deleted = manager.filter(
+                pk__in=pks[start:start + batch_size]
+            ).delete()
+            counts[model._meta.label_lower] += deleted.get(
+                model._meta.label, 0
+            )
+    return counts
+
+
+def fill_timestamps(obj):
+    """Пустые auto_now_add-поля получают время загрузки."""
+    for field in obj._meta.concrete_fields:
+        if getattr(field, 'auto_now_add', False):
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, timezone.now())
+
+
+class BulkLoader:
+    """
+    Накапливает объекты по моделям и вставляет их пачками.
+    Перед вставкой пачки сбрасываются буферы моделей, на которые
+    она ссылается, поэтому уже прочитанные родители всегда
+    оказываются в базе раньше детей.
+    """
+
+    def __init__(self, batch_size, using):
+        self.batch_size = batch_size
+        self.using = using
+        self.buffers = {}
+        self.counts = Counter()
+
+    def add(self, deserialized):
+        obj = deserialized.object
+        fill_timestamps(obj)
+        buffer = self.buffers.setdefault(type(obj), [])
+        buffer.append(deserialized)
+        if len(buffer) >= self.batch_size:
+            self.flush_with_dependencies(type(obj))
+
+    def flush_with_dependencies(self, model):
+        for dependency in reversed(dependencies(model)):
+            self.flush(dependency)
+        self.flush(model)
+
+    def flush_all(self):
+        for model in list(self.buffers):
+            self.flush_with_dependencies(model)
+
+    def flush(self, model):
+        batch = self.buffers.pop(model, [])
+        if not batch:
+            return
+        objects = [deserialized.object for deserialized in batch]
+        manager = model._base_manager.db_manager(self.using)
+        with transaction.atomic(using=self.using):
+            existing = set(manager.filter(
+                pk__in=[obj.pk for obj in objects]
+            ).values_list('pk', flat=True))
+            updated = [obj for obj in objects if obj.pk in existing]
+            created = [obj for obj in objects if obj.pk not in existing]
+            if updated:
+                manager.bulk_update(updated, [
+                    field.name for field in model._meta.concrete_fields
+                    if not field.primary_key
+                ])
+            if created:
+                # raw=True, как у loaddata: время изменения
+                # не перезаписывается текущим временем.
+                manager._insert(
+                    created,
+                    fields=model._meta.local_concrete_fields,
+                    using=self.using,
+                    raw=True,
+                )
+            for deserialized in batch:
+                for name, values in (deserialized.m2m_data or {}).items():
+                    getattr(deserialized.object, name).set(values)
+        self.counts[model._meta.label_lower] += len(batch)
+
+
+def import_objects(objects, batch_size=IMPORT_BATCH_SIZE, using='default'):
+    """
+    Загружает поток словарей в формате сериализатора Django.
+    Проверка внешних ключей откладывается до конца загрузки,
+    поскольку в дампе родители могут идти после детей. Отметки
+    об удалениях применяются после загрузки остальных объектов.
+    Возвращает количество загруженных и удалённых объектов
+    по моделям.
+    """
+    connection = connections[using]
+    loader = BulkLoader(batch_size, using)
+    deletions = {}
+    with deferred_indexes(INDEXED_MODELS, using):
+        with connection.constraint_checks_disabled():
+            for deserialized in Deserializer(
+                    fill_updated_at(split_deletions(objects, deletions)),
+                    using=using):
+                loader.add(deserialized)
+            loader.flush_all()
+        models = [apps.get_model(label) for label in loader.counts]
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in models]
+        )
+    deleted = apply_deletions(deletions, batch_size, using)
+    finish_bulk_load(models, batch_size, using)
+    return loader.counts, deleted
@@ -0,0 +1,182 @@
+import logging
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from threading import Event, Thread
+
+from django.db import close_old_connections, connections, transaction
+from django.utils.timezone import now
+
+from .blobs import blob_names, change_refs
+from .cache import invalidate_feeds
+from .constants import (
+    JOB_HEARTBEAT_INTERVAL,
+    JOB_HEARTBEAT_TIMEOUT,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_SLEEP,
+    JOB_RETRY_DELAY,
+    JOB_WORKERS,
+    PROCESS_IMAGE_JOB,
+)
+from .images import render_variants
+from blog.models import FeedEntry, Job, Post
+from blog.utils import setup_worker_process
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def handler(kind):
+    """Регистрирует функцию, выполняющую задачи вида `kind`."""
+    def decorator(func):
+        handlers[kind] = func
+        return func
+    return decorator
+
+
+@handler(PROCESS_IMAGE_JOB)
+def process_post_image(post_id, image):
+    """
+    Создаёт уменьшенные копии фото поста. Если фото успели заменить,
+    задача ничего не делает: копии создаст задача нового фото.
+    """
+    post = Post.objects.filter(pk=post_id, image=image).first()
+    if post is None:
+        return
+    variants = render_variants(post.image)
+    with transaction.atomic():
+        updated = Post.objects.filter(pk=post_id, image=image).update(
+            image_variants=variants, updated_at=now()
+        )
+        if updated:
+            change_refs(
+                blob_names(image, variants),
+                blob_names(image, post.image_variants),
+            )
+    if updated:
+        FeedEntry.objects.refresh_posts([post_id])
+        invalidate_feeds([post.category_id], [post.author_id])
+
+
+def execute_job(pk):
+    """Выполняет захваченную задачу и записывает её результат."""
+    close_old_connections()
+    job = Job.objects.get(pk=pk)
+    try:
+        handlers[job.kind](**job.payload)
+    except Exception:
+        retry = job.attempts < JOB_MAX_ATTEMPTS
+        logger.exception('Ошибка задачи %s', job)
+        Job.objects.filter(pk=pk).update(
+            status=Job.PENDING if retry else Job.FAILED,
+            run_after=now() + timedelta(
+                seconds=JOB_RETRY_DELAY * job.attempts
+            ),
+            last_error=traceback.format_exc(),
+            finished_at=None if retry else now(),
+        )
+        return False
+    else:
+        Job.objects.filter(pk=pk).update(
+            status=Job.DONE, finished_at=now(), last_error=''
+        )
+        return True
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit=None):
+    """
+    Выполняет готовые задачи в текущем потоке, пока очередь
+    не опустеет. Возвращает количество выполненных задач.
+    """
+    done = 0
+    while limit is None or done < limit:
+        claimed = Job.objects.claim(1)
+        if not claimed:
+            return done
+        execute_job(claimed[0])
+        done += 1
+    return done
+
+
+class JobWorker:
+    """
+    Воркер очереди: забирает задачи пачками по числу исполнителей
+    и выполняет их в пуле потоков или процессов.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, processes=False,
+                 max_sleep=JOB_MAX_SLEEP):
+        self.workers = workers
+        self.processes = processes
+        self.max_sleep = max_sleep
+        self._wakeup = Event()
+        self._stop = Event()
+        self._thread = None
+
+    def run_forever(self):
+        """Основной цикл воркера."""
+        if self.processes:
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                self.workers, initializer=setup_worker_process
+            )
+        else:
+            pool = ThreadPoolExecutor(self.workers)
+        with pool:
+            while not self._stop.is_set():
+                try:
+                    Job.objects.requeue_stale(
+                        JOB_HEARTBEAT_TIMEOUT, JOB_MAX_ATTEMPTS
+                    )
+                    claimed = Job.objects.claim(self.workers)
+                except Exception:
+                    logger.exception('Ошибка очереди задач')
+                    claimed = []
+                if claimed:
+                    self.execute(pool, claimed)
+                    continue
+                self._wakeup.wait(self.max_sleep)
+                self._wakeup.clear()
+
+    def execute(self, pool, claimed):
+        """
+        Выполняет задачи в пуле и, пока они идут, обновляет их пульс:
+        по нему другие воркеры отличают долгую задачу от брошенной.
+        """
+        running = {pool.submit(execute_job, pk): pk for pk in claimed}
+        while running:
+            done, _ = wait(running, timeout=JOB_HEARTBEAT_INTERVAL)
+            for future in done:
+                del running[future]
+            if running:
+                try:
+                    Job.objects.beat(running.values())
+                except Exception:
+                    logger.exception('Ошибка очереди задач')
+
+    def wake(self):
+        """Проверяет очередь сразу, например после новой задачи."""
+        self._wakeup.set()
+
+    def start(self):
+        """Запускает воркер в фоновом потоке текущего процесса."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(
+                target=self.run_forever, name='job-worker', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновый поток."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+worker = JobWorker()
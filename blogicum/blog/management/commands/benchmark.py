@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from blog.benchmark import (
+    compare,
+    make_baseline,
+    run_benchmarks,
+    seed_dataset,
+)
+from blog.constants import (
+    BENCHMARK_LATENCY_SLACK_MS,
+    BENCHMARK_LATENCY_TOLERANCE,
+    BENCHMARK_REQUESTS,
+    GENERATOR_CHUNK_SIZE,
+)
+from blog.models import Post
+
+BENCHMARK_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+
+
+def benchmark_database_name():
+    """Имя отдельной базы для замеров рядом с основной."""
+    name = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        return str(Path(name).with_name('benchmark.sqlite3'))
+    return f'benchmark_{name}'
+
+
+def benchmark_caches(location):
+    """
+    Кэши с тем же бэкендом, но в отдельном каталоге: общий с сайтом
+    файловый кэш отдавал бы замерам страницы основной базы.
+    """
+    return {
+        alias: {**params, 'LOCATION': str(Path(location) / alias)}
+        for alias, params in settings.CACHES.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки и количество запросов к базе для всех '
+        'маршрутов на синтетических данных с пустым и заполненным '
+        'кэшем и сравнивает с эталоном. Данные хранятся в отдельной '
+        'базе и переиспользуются, кэш — во временном каталоге.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--fresh',
+            action='store_true',
+            help='Пересоздать базу замеров и заново заполнить её.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--chunk-size', type=int, default=GENERATOR_CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=BENCHMARK_REQUESTS,
+            help='Количество замеров на каждый маршрут.',
+        )
+        parser.add_argument(
+            '--output', default=str(BENCHMARK_DIR / 'results.json')
+        )
+        parser.add_argument(
+            '--baseline', default=str(BENCHMARK_DIR / 'baseline.json')
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=BENCHMARK_LATENCY_TOLERANCE,
+            help='Допустимый относительный рост p90.',
+        )
+        parser.add_argument(
+            '--slack-ms',
+            type=float,
+            default=BENCHMARK_LATENCY_SLACK_MS,
+            help='Допустимый абсолютный рост p90 в миллисекундах.',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Записать результаты как новый эталон.',
+        )
+
+    def handle(self, *args, **options):
+        connection.settings_dict['TEST']['NAME'] = benchmark_database_name()
+        connection.creation.create_test_db(
+            verbosity=options['verbosity'],
+            autoclobber=True,
+            keepdb=not options['fresh'],
+            serialize=False,
+        )
+        setup_test_environment(debug=False)
+        try:
+            with TemporaryDirectory() as cache_dir, override_settings(
+                CACHES=benchmark_caches(cache_dir)
+            ):
+                if not Post.objects.exists():
+                    self.stdout.write('Заполнение базы замеров...')
+                    seed_dataset(
+                        options['users'], options['posts'],
+                        options['comments'], options['seed'],
+                        options['chunk_size'],
+                    )
+                results = run_benchmarks(options['requests'])
+        finally:
+            teardown_test_environment()
+        self.write_json(options['output'], results)
+        self.report(results)
+        if options['update_baseline']:
+            self.write_json(options['baseline'], make_baseline(results))
+            self.stdout.write(self.style.SUCCESS('Эталон обновлён.'))
+            return
+        baseline_path = Path(options['baseline'])
+        if not baseline_path.exists():
+            self.stdout.write('Эталон не найден, сравнение пропущено.')
+            return
+        regressions = compare(
+            results,
+            json.loads(baseline_path.read_text(encoding='utf-8')),
+            options['tolerance'],
+            options['slack_ms'],
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
+
+    def write_json(self, path, data):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8',
+        )
+
+    def report(self, results):
+        self.stdout.write(
+            'Данные: ' + ', '.join(
+                f'{name} {count}'
+                for name, count in results['dataset'].items()
+            )
+        )
+        self.stdout.write(
+            f'Эталонная нагрузка: {results["reference_ms"]:.2f} мс'
+        )
+        for route, result in results['routes'].items():
+            for state in ('cold', 'warm'):
+                timings = result[state]
+                self.stdout.write(
+                    f'{route:40} {state:4} {result["status"]} '
+                    f'p50 {timings["p50_ms"]:8.2f} '
+                    f'p90 {timings["p90_ms"]:8.2f} '
+                    f'p99 {timings["p99_ms"]:8.2f} мс, '
+                    f'запросов {timings["queries"]}'
+                )
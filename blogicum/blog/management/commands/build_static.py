@@ -0,0 +1,51 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from blog.constants import STATIC_ENCODINGS
+from blog.storage import brotli
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статику через collectstatic: добавляет хэш содержимого '
+        'в имена, пишет сжатые копии .br и .gz и манифест.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить ранее собранные файлы перед сборкой.',
+        )
+
+    def handle(self, *args, **options):
+        if brotli is None:
+            self.stderr.write(
+                'Пакет brotli не установлен: копии .br не создаются.'
+            )
+        call_command(
+            'collectstatic',
+            interactive=False,
+            clear=options['clear'],
+            verbosity=max(options['verbosity'] - 1, 0),
+        )
+        storage = staticfiles_storage
+        suffixes = dict(STATIC_ENCODINGS)
+        for encoding, _ in STATIC_ENCODINGS:
+            names = [
+                name for name, encodings in storage.encodings.items()
+                if encoding in encodings
+            ]
+            original = sum(storage.size(name) for name in names)
+            compressed = sum(
+                storage.size(name + suffixes[encoding]) for name in names
+            )
+            self.stdout.write(
+                f'{encoding}: файлов {len(names)}, '
+                f'{original} → {compressed} байт'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов с хэшем в имени: {len(storage.hashed_names)}. '
+            f'Манифест: {storage.path(storage.manifest_name)}'
+        ))
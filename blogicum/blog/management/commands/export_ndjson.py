@@ -0,0 +1,81 @@
+import gzip
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.constants import EXPORT_CHUNK_SIZE
+from blog.exporter import export_objects
+
+
+def parse_since(value):
+    since = parse_datetime(value.strip())
+    if since is None:
+        raise CommandError(f'Неверная дата: {value}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает пользователей, категории, места, посты '
+        'и комментарии в NDJSON. Формат совместим с import_dump.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Файл выгрузки или "-" для стандартного вывода.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку; включается и расширением .gz.',
+        )
+        parser.add_argument(
+            '--since',
+            help=(
+                'Выгрузить только строки, изменённые с этого момента, '
+                'и отметки об удалённых с него объектах.'
+            ),
+        )
+        parser.add_argument(
+            '--watermark-file',
+            help=(
+                'Файл с отметкой прошлой выгрузки: без --since она '
+                'читается из него, после выгрузки записывается новая.'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за один раз.',
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        watermark = options['watermark_file'] and Path(
+            options['watermark_file']
+        )
+        since = options['since']
+        if since is None and watermark and watermark.exists():
+            since = watermark.read_text(encoding='utf-8')
+        since = since and parse_since(since)
+        output = options['output']
+        compress = options['gzip'] or output.endswith('.gz')
+        if output == '-':
+            if compress:
+                raise CommandError('Сжатый вывод нужно писать в файл.')
+            counts = export_objects(self.stdout, since, options['chunk_size'])
+        else:
+            opener = gzip.open if compress else open
+            with opener(output, 'wt', encoding='utf-8') as stream:
+                counts = export_objects(stream, since, options['chunk_size'])
+        if watermark:
+            watermark.write_text(started_at.isoformat(), encoding='utf-8')
+        self.stderr.write(', '.join(
+            f'{label}: {count}' for label, count in counts.items()
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from blog.blobs import collect_garbage, recount_refs
+from blog.constants import BLOB_GC_BATCH_SIZE, BLOB_GC_MIN_AGE
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из хранилища файлы изображений, на которые не ссылается '
+        'ни один пост. Файлы перебираются пачками, память ограничена.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Сначала пересчитать ссылки по постам, например после '
+                 'loaddata.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=BLOB_GC_MIN_AGE,
+            help='Не трогать файлы моложе этого возраста в секундах.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BLOB_GC_BATCH_SIZE,
+            help='Количество файлов, проверяемых одним запросом.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать файлы без ссылок, ничего не удаляя.',
+        )
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            recount_refs(options['batch_size'])
+        path = Post._meta.get_field('image').upload_to
+        seen, deleted = collect_garbage(
+            path,
+            batch_size=options['batch_size'],
+            min_age=options['min_age'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Можно удалить' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Просмотрено файлов: {seen}. {verb}: {deleted}'
+        ))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.constants import GENERATOR_CHUNK_SIZE
+from blog.generator import MODELS, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетических пользователей, категории, места, '
+        'посты и комментарии для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора; одинаковое зерно даёт одинаковые данные.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=GENERATOR_CHUNK_SIZE,
+            help='Количество объектов, вставляемых в одной транзакции.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество параллельных процессов.',
+        )
+
+    def handle(self, *args, **options):
+        counts = {kind: options[kind] for kind in MODELS}
+        if (counts['posts'] or counts['comments']) and not counts['users']:
+            raise CommandError('Постам и комментариям нужны авторы.')
+        if counts['comments'] and not counts['posts']:
+            raise CommandError('Комментариям нужны посты.')
+        generate(
+            counts,
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            progress=lambda kind, total: self.stdout.write(
+                f'{kind}: {total}'
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы.'))
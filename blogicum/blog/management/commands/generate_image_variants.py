@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import UnidentifiedImageError
+
+from blog.blobs import blob_names, change_refs
+from blog.cache import invalidate_all_pages
+from blog.constants import IMAGE_BACKFILL_BATCH_SIZE, PROCESS_IMAGE_JOB
+from blog.images import render_variants
+from blog.models import FeedEntry, Job, Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии фото для уже загруженных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и для постов, у которых они уже есть.',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Поставить обработку в очередь задач, а не выполнять сразу.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMAGE_BACKFILL_BATCH_SIZE,
+            help='Количество постов, обрабатываемых за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(image_variants={})
+        done = failed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_id)
+                .only('pk', 'image', 'image_variants')
+                [:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            if options['enqueue']:
+                Job.objects.bulk_create(
+                    Job(kind=PROCESS_IMAGE_JOB, payload={
+                        'post_id': post.pk, 'image': post.image.name,
+                    })
+                    for post in batch
+                )
+                done += len(batch)
+                continue
+            updated = []
+            for post in batch:
+                try:
+                    variants = render_variants(post.image)
+                except (OSError, UnidentifiedImageError) as error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post.pk}: {error}')
+                    continue
+                with transaction.atomic():
+                    Post.objects.filter(pk=post.pk).update(
+                        image_variants=variants, updated_at=timezone.now()
+                    )
+                    change_refs(
+                        blob_names(post.image, variants),
+                        blob_names(post.image, post.image_variants),
+                    )
+                updated.append(post.pk)
+            FeedEntry.objects.refresh_posts(updated)
+            done += len(updated)
+        if done and not options['enqueue']:
+            invalidate_all_pages()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {done}, с ошибками: {failed}'
+        ))
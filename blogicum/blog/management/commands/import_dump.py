@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from blog.constants import IMPORT_BATCH_SIZE
+from blog.importer import import_objects, iter_json_array, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает дамп в формате Django (JSON или NDJSON) '
+        'пачками bulk-вставок. Память не растёт с размером дампа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу дампа.')
+        parser.add_argument(
+            '--format',
+            choices=('auto', 'json', 'ndjson'),
+            default='auto',
+            help='Формат дампа; auto определяет его по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество объектов одной модели в одной вставке.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        dump_format = options['format']
+        if dump_format == 'auto':
+            dump_format = (
+                'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'json'
+            )
+        read = iter_ndjson if dump_format == 'ndjson' else iter_json_array
+        try:
+            with open(path, encoding='utf-8') as stream:
+                counts, deleted = import_objects(
+                    read(stream), options['batch_size']
+                )
+        except (OSError, ValueError, IntegrityError) as error:
+            raise CommandError(f'Не удалось загрузить дамп: {error}')
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(counts.values())}'
+        ))
+        if deleted:
+            self.stdout.write(self.style.SUCCESS(
+                f'Удалено объектов: {sum(deleted.values())}'
+            ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from blog.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Выводит количество фоновых задач по видам и состояниям.'
+
+    def handle(self, *args, **options):
+        rows = (
+            Job.objects.order_by('kind', 'status').values('kind', 'status')
+            .annotate(total=Count('pk'))
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["kind"]:24} {row["status"]:8} {row["total"]}'
+            )
+        for job in Job.objects.filter(status=Job.FAILED)[:10]:
+            last_line = job.last_error.strip().splitlines()[-1:]
+            self.stdout.write(f'{job}: {"".join(last_line)}')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import FEED_REFRESH_BATCH_SIZE
+from blog.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает ленту видимых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=FEED_REFRESH_BATCH_SIZE,
+            help='Количество постов, обрабатываемых в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        total = FeedEntry.objects.refresh_where(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано постов: {total}')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import RECOUNT_BATCH_SIZE
+from blog.counters import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Заполняет и исправляет счётчики комментариев у постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECOUNT_BATCH_SIZE,
+            help='Количество постов, обрабатываемых в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        fixed = recount_comments(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}')
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import JOB_MAX_SLEEP, JOB_WORKERS
+from blog.jobs import JobWorker, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди, например обработку фото.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=JOB_WORKERS,
+            help='Количество параллельно выполняемых задач.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Выполнять задачи в пуле процессов вместо потоков.',
+        )
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=JOB_MAX_SLEEP,
+            help='Как долго (в секундах) ждать перед проверкой очереди.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = run_pending()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        worker = JobWorker(
+            options['workers'], options['processes'], options['max_sleep']
+        )
+        self.stdout.write('Воркер очереди задач запущен.')
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Воркер очереди задач остановлен.')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import SCHEDULER_MAX_SLEEP
+from blog.scheduler import PublicationScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет события о публикации отложенных постов '
+        'в момент наступления их даты публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=SCHEDULER_MAX_SLEEP,
+            help=(
+                'Как долго (в секундах) можно спать, не перечитывая '
+                'расписание из базы данных.'
+            ),
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать наступившие публикации и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = PublicationScheduler(options['max_sleep'])
+        if options['once']:
+            scheduler.run_pending()
+            return
+        self.stdout.write('Планировщик публикаций запущен.')
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Планировщик публикаций остановлен.')
@@ -1,6 +1,12 @@
-from django.db.models import Count, Manager, QuerySet
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Manager, Min, Q, QuerySet
+from django.utils.text import Truncator
 from django.utils.timezone import now
 
+from .constants import EXCERPT_WORDS, FEED_REFRESH_BATCH_SIZE
+
 
 class PostQuerySet(QuerySet):
     """
@@ -26,14 +32,29 @@ class PostQuerySet(QuerySet):
             category__is_published=True
         )
 
-    def comment_count(self):
+    def visible_to(self, user):
+        """
+        Фильтрует посты, которые может видеть пользователь:
+        опубликованные и, для авторизованного, его собственные.
+        """
+        published = Q(
+            is_published=True,
+            pub_date__lt=now(),
+            category__is_published=True
+        )
+        if user.is_authenticated:
+            return self.filter(published | Q(author=user))
+        return self.filter(published)
+
+    def newest_first(self):
         """
-        Аннотирует количество комментариев к постам
-        и сортирует их по дате публикации.
+        Сортирует посты по дате публикации.
+        Количество комментариев хранится в поле `comment_count`,
+        поэтому агрегировать таблицу комментариев не нужно.
+        Идентификатор в сортировке нужен для стабильной
+        пагинации по курсору (pub_date, id).
         """
-        return self.annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
+        return self.order_by('-pub_date', '-id')
 
     def by_author(self, author):
         """Возвращает посты конкретного автора."""
@@ -58,30 +79,192 @@ class PostManager(Manager):
         """Возвращает опубликованные посты."""
         return self.get_queryset().published()
 
+    def get_for_detail(self, user):
+        """
+        Возвращает посты, доступные пользователю на странице поста,
+        чтобы проверить видимость одним запросом.
+        """
+        return self.get_queryset().visible_to(user)
+
     def get_for_index(self):
         """
         Возвращает посты для отображения на главной странице
         с количеством комментариев.
         """
-        return self.get_pub().comment_count()
+        return self.get_pub().newest_first()
 
     def get_for_category(self, category):
         """
         Возвращает посты для конкретной категории
-        с аннотацией количества комментариев.
+        с количеством комментариев.
         """
-        return self.get_pub().by_category(category).comment_count()
+        return self.get_pub().by_category(category).newest_first()
 
     def get_for_profile(self, author):
         """
         Возвращает опубликованные посты конкретного автора
         с количеством комментариев.
         """
-        return self.get_pub().by_author(author).comment_count()
+        return self.get_pub().by_author(author).newest_first()
 
     def get_for_profile_auth(self, author):
         """
         Возвращает все посты конкретного автора
         с количеством комментариев,включая неопубликованные.
         """
-        return self.get_queryset().by_author(author).comment_count()
+        return self.get_queryset().by_author(author).newest_first()
+
+    def get_next_publication_date(self):
+        """
+        Возвращает ближайшую дату отложенной публикации
+        или None, если отложенных постов нет.
+        """
+        return PostQuerySet(self.model).filter(
+            is_published=True, pub_date__gte=now()
+        ).aggregate(next_date=Min('pub_date'))['next_date']
+
+
+class FeedEntryQuerySet(QuerySet):
+    """QuerySet для предвычисленной ленты видимых постов."""
+
+    def visible(self):
+        """
+        Возвращает записи, дата публикации которых уже наступила.
+        Флаги публикации поста и категории учтены при построении ленты.
+        """
+        return self.filter(pub_date__lt=now())
+
+    def newest_first(self):
+        """Сортирует записи ленты по дате публикации."""
+        return self.order_by('-pub_date', '-post_id')
+
+
+class FeedEntryManager(Manager):
+    """
+    Менеджер ленты видимых постов.
+    Поддерживает ленту в актуальном состоянии при изменении постов.
+    """
+
+    def get_queryset(self):
+        return FeedEntryQuerySet(self.model)
+
+    def get_for_index(self):
+        """Возвращает записи для главной страницы."""
+        return self.get_queryset().visible().newest_first()
+
+    def get_for_category(self, category):
+        """Возвращает записи ленты конкретной категории."""
+        return self.get_for_index().filter(category=category)
+
+    def get_for_profile(self, author):
+        """Возвращает записи ленты конкретного автора."""
+        return self.get_for_index().filter(author=author)
+
+    def build_entry(self, post):
+        """Создаёт (без сохранения) запись ленты для поста."""
+        location = post.location
+        return self.model(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            title=post.title,
+            excerpt=Truncator(post.text).words(EXCERPT_WORDS, truncate=' …'),
+            image=post.image.name,
+            image_variants=post.image_variants,
+            comment_count=post.comment_count,
+            author_id=post.author_id,
+            author_username=post.author.username,
+            category_id=post.category_id,
+            category_slug=post.category.slug,
+            category_title=post.category.title,
+            location_id=post.location_id,
+            location_name=(
+                location.name if location and location.is_published else ''
+            ),
+        )
+
+    def refresh_posts(self, post_ids):
+        """Перестраивает записи ленты для переданных постов."""
+        posts_model = self.model._meta.get_field('post').related_model
+        with transaction.atomic():
+            self.filter(post_id__in=post_ids).delete()
+            self.bulk_create(
+                self.build_entry(post)
+                for post in posts_model.objects.select_related(
+                    'author', 'category', 'location'
+                ).filter(
+                    pk__in=post_ids,
+                    is_published=True,
+                    category__is_published=True,
+                )
+            )
+
+    def refresh_where(self, batch_size=FEED_REFRESH_BATCH_SIZE, **filters):
+        """
+        Перестраивает ленту для постов, подходящих под фильтр,
+        пачками по `batch_size` постов. Возвращает число постов.
+        """
+        posts_model = self.model._meta.get_field('post').related_model
+        posts = posts_model.objects.filter(**filters).order_by('pk')
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                posts.filter(pk__gt=last_id)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            self.refresh_posts(ids)
+            total += len(ids)
+            last_id = ids[-1]
+
+
+class JobManager(Manager):
+    """Менеджер очереди фоновых задач."""
+
+    def enqueue(self, kind, **payload):
+        """Ставит задачу в очередь; она видна воркерам после коммита."""
+        return self.create(kind=kind, payload=payload)
+
+    def requeue_stale(self, timeout, max_attempts):
+        """
+        Возвращает в очередь задачи, воркер которых не подавал сигнал
+        дольше `timeout` секунд: он упал или был убит. Задача, исчерпавшая
+        попытки, помечается ошибкой — иначе задача, роняющая воркер,
+        повторялась бы бесконечно. Возвращает число возвращённых задач.
+        """
+        stale = self.filter(
+            status=self.model.RUNNING,
+            heartbeat_at__lt=now() - timedelta(seconds=timeout),
+        )
+        stale.filter(attempts__gte=max_attempts).update(
+            status=self.model.FAILED,
+            finished_at=now(),
+            last_error='Воркер перестал отвечать во время выполнения.',
+        )
+        return stale.update(status=self.model.PENDING)
+
+    def beat(self, pks):
+        """Отмечает, что воркер ещё выполняет задачи `pks`."""
+        return self.filter(
+            pk__in=list(pks), status=self.model.RUNNING
+        ).update(heartbeat_at=now())
+
+    def claim(self, limit):
+        """
+        Забирает до `limit` готовых задач. Захват — условный UPDATE,
+        поэтому одну задачу не возьмут два воркера даже без
+        SELECT ... FOR UPDATE.
+        """
+        candidates = self.filter(
+            status=self.model.PENDING, run_after__lte=now()
+        ).order_by('run_after', 'pk').values_list('pk', flat=True)[:limit]
+        claimed = []
+        for pk in candidates:
+            if self.filter(pk=pk, status=self.model.PENDING).update(
+                    status=self.model.RUNNING,
+                    started_at=now(),
+                    heartbeat_at=now(),
+                    attempts=F('attempts') + 1):
+                claimed.append(pk)
+        return claimed
@@ -0,0 +1,260 @@
+import mimetypes
+import os
+import posixpath
+import re
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .constants import (
+    MEDIA_BLOCK_SIZE,
+    MEDIA_IMMUTABLE_MAX_AGE,
+    MEDIA_MAX_AGE,
+    STATIC_ENCODINGS,
+)
+
+CONTENT_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})(\.\w+)?$')
+RANGE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+REJECTED = re.compile(r'^q=0(\.0{0,3})?$')
+
+ACCEL_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+
+class RangeFile:
+    """
+    Читает из файла не больше `length` байт начиная со `start`.
+    Методов seek и tell нет намеренно: иначе FileResponse посчитает
+    длину до конца файла, а не до конца диапазона.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def validators(path, stat):
+    """
+    Возвращает ETag и Last-Modified файла. Имя блоба в хранилище — хэш
+    содержимого, поэтому оно само служит строгим ETag.
+    """
+    match = CONTENT_NAME.match(posixpath.basename(path))
+    if match:
+        etag = match['digest']
+    else:
+        etag = f'{stat.st_size:x}-{int(stat.st_mtime):x}'
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+    return quote_etag(etag), last_modified
+
+
+def byte_range(header, size):
+    """
+    Разбирает заголовок Range. Возвращает (start, end) включительно,
+    None для отсутствующего или неподдерживаемого заголовка
+    (тогда отдаётся весь файл) и ValueError для невыполнимого.
+    Несколько диапазонов сразу не поддерживаются.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or not (match['start'] or match['end']):
+        return None
+    if not match['start']:
+        length = int(match['end'])
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(match['start'])
+    end = int(match['end']) if match['end'] else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, last_modified):
+    """Проверяет If-Range: диапазон отдаётся только для той же версии."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == int(last_modified.timestamp())
+
+
+def cache_headers(response, etag, last_modified, immutable):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Accept-Ranges'] = 'bytes'
+    if immutable:
+        response['Cache-Control'] = (
+            f'public, max-age={MEDIA_IMMUTABLE_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}'
+    return response
+
+
+def accepted_encodings(header):
+    """
+    Разбирает Accept-Encoding в словарь «кодировка — допустима ли».
+    Запрет q=0 хранится явно: по RFC 9110 он важнее, чем `*`.
+    """
+    accepted = {}
+    for item in header.lower().split(','):
+        coding, _, params = item.partition(';')
+        if coding.strip():
+            accepted[coding.strip()] = not REJECTED.match(
+                params.replace(' ', '')
+            )
+    return accepted
+
+
+def accepts_encoding(accepted, coding):
+    """Допустима ли кодировка: названа явно или подходит под `*`."""
+    return accepted.get(coding, accepted.get('*', False))
+
+
+def accel_response(path, full_path, content_type, prefix):
+    """Передаёт отдачу файла веб-серверу, стоящему перед приложением."""
+    response = HttpResponse(content_type=content_type)
+    accel = settings.BLOG_MEDIA_ACCEL
+    if accel == 'x-accel-redirect':
+        location = prefix + quote(path)
+    else:
+        location = full_path
+    response[ACCEL_HEADERS[accel]] = location
+    return response
+
+
+def file_response(request, full_path, size, content_type, if_range):
+    """Отдаёт файл целиком или запрошенный диапазон байт."""
+    requested = None
+    if if_range:
+        try:
+            requested = byte_range(request.META.get('HTTP_RANGE', ''), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(full_path, 'rb')
+    if requested is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = requested
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response.block_size = MEDIA_BLOCK_SIZE
+    return response
+
+
+def send_file(request, root, path, accel_prefix, immutable,
+              content_type=None, encoding=None):
+    """
+    Отдаёт файл `path` из каталога `root`: отвечает 304 на условный
+    запрос, передаёт файл веб-серверу, если задан BLOG_MEDIA_ACCEL,
+    или отдаёт его сам с поддержкой Range.
+    """
+    try:
+        full_path = safe_join(root, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    etag, last_modified = validators(path, stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        if content_type is None:
+            content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+        if settings.BLOG_MEDIA_ACCEL:
+            response = accel_response(
+                path, full_path, content_type, accel_prefix
+            )
+        else:
+            response = file_response(
+                request, full_path, stat.st_size, content_type,
+                if_range_matches(request, etag, last_modified),
+            )
+        if response.status_code == 416:
+            return response
+        if encoding:
+            response['Content-Encoding'] = encoding
+    return cache_headers(response, etag, last_modified, immutable)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт загруженные файлы из MEDIA_ROOT.
+
+    Если перед приложением стоит веб-сервер, в BLOG_MEDIA_ACCEL
+    указывается способ передачи ему файла: `x-accel-redirect` (nginx,
+    адрес внутреннего location из BLOG_MEDIA_ACCEL_PREFIX) или
+    `x-sendfile` (Apache, lighttpd — абсолютный путь). Иначе файл
+    отдаётся сам с поддержкой условных запросов и Range.
+    """
+    return send_file(
+        request, settings.MEDIA_ROOT, path,
+        settings.BLOG_MEDIA_ACCEL_PREFIX,
+        immutable=bool(CONTENT_NAME.match(posixpath.basename(path))),
+    )
+
+
+@require_safe
+def serve_static(request, path):
+    """
+    Отдаёт собранную статику из STATIC_ROOT. Файлы с хэшем в имени
+    кэшируются навсегда, а сжатая копия выбирается по Accept-Encoding.
+    При x-accel-redirect nginx получает исходное имя и сам выбирает
+    копию модулями gzip_static и brotli_static.
+    """
+    encodings = staticfiles_storage.encodings.get(path, ())
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if settings.BLOG_MEDIA_ACCEL == 'x-accel-redirect':
+        accepted = {}
+    suffixes = dict(STATIC_ENCODINGS)
+    content_type = encoding = None
+    served = path
+    for candidate in encodings:
+        if accepts_encoding(accepted, candidate):
+            content_type = mimetypes.guess_type(path)[0]
+            encoding = candidate
+            served = path + suffixes[candidate]
+            break
+    response = send_file(
+        request, settings.STATIC_ROOT, served,
+        settings.BLOG_STATIC_ACCEL_PREFIX,
+        immutable=path in staticfiles_storage.hashed_names,
+        content_type=content_type, encoding=encoding,
+    )
+    if encodings:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
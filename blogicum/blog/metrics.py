@@ -0,0 +1,271 @@
+import os
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .constants import DURATION_BUCKETS, QUERY_COUNT_BUCKETS
+
+current_metrics = ContextVar('blog_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Показатели одного запроса."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL для `connection.execute_wrapper`."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += perf_counter() - start
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus с накопительными корзинами."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.total}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class MetricsRegistry:
+    """
+    Накопленные показатели запросов по именам URL в этом процессе.
+    Каждый процесс сервера копит свои показатели и помечает их
+    меткой `pid`: при нескольких воркерах нужно опрашивать каждый,
+    а суммировать по `pid` уже в Prometheus.
+    """
+
+    histograms = (
+        ('blog_request_duration_seconds', 'Время обработки запроса.',
+         DURATION_BUCKETS),
+        ('blog_db_duration_seconds', 'Время запросов к базе данных.',
+         DURATION_BUCKETS),
+        ('blog_db_queries', 'Количество запросов к базе данных.',
+         QUERY_COUNT_BUCKETS),
+        ('blog_template_duration_seconds', 'Время рендеринга шаблонов.',
+         DURATION_BUCKETS),
+    )
+    counters = (
+        ('blog_cache_hits_total', 'Попадания в кэш.'),
+        ('blog_cache_misses_total', 'Промахи кэша.'),
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = {}
+
+    def observe(self, view_name, duration, metrics):
+        values = (
+            duration, metrics.db_time, metrics.db_queries,
+            metrics.template_time,
+        )
+        with self._lock:
+            view = self._views.get(view_name)
+            if view is None:
+                view = self._views[view_name] = {
+                    'histograms': [
+                        Histogram(buckets)
+                        for _, _, buckets in self.histograms
+                    ],
+                    'counters': [0] * len(self.counters),
+                }
+            for histogram, value in zip(view['histograms'], values):
+                histogram.observe(value)
+            view['counters'][0] += metrics.cache_hits
+            view['counters'][1] += metrics.cache_misses
+
+    def render(self):
+        """Возвращает показатели в текстовом формате Prometheus."""
+        lines = []
+        pid = os.getpid()
+        with self._lock:
+            views = sorted(self._views.items())
+            for index, (name, help_text, _) in enumerate(self.histograms):
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram']
+                for view_name, view in views:
+                    lines += view['histograms'][index].lines(
+                        name, f'view="{view_name}",pid="{pid}"'
+                    )
+            for index, (name, help_text) in enumerate(self.counters):
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} counter']
+                for view_name, view in views:
+                    lines.append(
+                        f'{name}{{view="{view_name}",pid="{pid}"}} '
+                        f'{view["counters"][index]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого учитывается в текущем запросе."""
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        metrics.template_depth += 1
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Бэкенд шаблонов Django, замеряющий рендеринг шаблонов верхнего
+    уровня: {% include %} рендерится внутри них и не учитывается дважды.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def counted_get(get, metrics):
+    """Учитывает попадания и промахи `cache.get`."""
+    @wraps(get)
+    def wrapper(key, default=None, version=None):
+        value = get(key, default, version)
+        if value is default:
+            metrics.cache_misses += 1
+        else:
+            metrics.cache_hits += 1
+        return value
+    return wrapper
+
+
+def counted_get_many(get_many, metrics):
+    """Учитывает попадания и промахи `cache.get_many`."""
+    @wraps(get_many)
+    def wrapper(keys, version=None):
+        keys = list(keys)
+        # Базовая реализация вызывает get() для каждого ключа,
+        # поэтому итог считается от значений до вызова.
+        hits, misses = metrics.cache_hits, metrics.cache_misses
+        values = get_many(keys, version)
+        metrics.cache_hits = hits + len(values)
+        metrics.cache_misses = misses + len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def count_cache_reads(stack, metrics):
+    """
+    Считает чтения из кэшей на время запроса. Объекты кэшей у каждого
+    потока свои, поэтому обёртки ставятся на них, а не на классы,
+    и снимаются при выходе из `stack`.
+    """
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        for name, wrap in (
+            ('get', counted_get), ('get_many', counted_get_many),
+        ):
+            setattr(backend, name, wrap(getattr(backend, name), metrics))
+            stack.callback(delattr, backend, name)
+
+
+def server_timing(duration, metrics):
+    """Формирует значение заголовка Server-Timing."""
+    return ', '.join((
+        f'app;dur={duration * 1000:.1f}',
+        f'db;dur={metrics.db_time * 1000:.1f};'
+        f'desc="{metrics.db_queries} queries"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'cache;desc="hit={metrics.cache_hits} '
+        f'miss={metrics.cache_misses}"',
+    ))
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет время запроса, запросы к базе, рендеринг шаблонов
+    и обращения к кэшу, отдаёт их в заголовке Server-Timing
+    и накапливает по именам URL. Время шаблонов замеряет бэкенд
+    TimedDjangoTemplates, подключённый в TEMPLATES.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                count_cache_reads(stack, metrics)
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration = perf_counter() - start
+        response['Server-Timing'] = server_timing(duration, metrics)
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match else 'unresolved', duration, metrics
+        )
+        return response
+
+
+def metrics_view(request):
+    """
+    Отдаёт накопленные показатели только для INTERNAL_IPS.
+    Ответ содержит показатели одного процесса — того, что принял
+    запрос; см. MetricsRegistry.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
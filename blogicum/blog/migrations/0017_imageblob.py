@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:16
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def fill_refcounts(apps, schema_editor):
+    ImageBlob = apps.get_model('blog', 'ImageBlob')
+    Post = apps.get_model('blog', 'Post')
+    counts = Counter()
+    for image, variants in Post.objects.exclude(image='').values_list(
+            'image', 'image_variants').iterator():
+        counts.update(
+            {image} | {variant['name'] for variant in variants.values()}
+        )
+    ImageBlob.objects.bulk_create(
+        ImageBlob(name=name, refcount=count)
+        for name, count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+            ],
+            options={
+                'verbose_name': 'файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.RunPython(fill_refcounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    """Выполняемые задачи получают пульс на момент своего запуска."""
+    Job = apps.get_model('blog', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_imageblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(null=True, verbose_name='Последний сигнал воркера'),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_updated_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_pk', models.BigIntegerField(verbose_name='Ключ объекта')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Удалён')),
+            ],
+            options={
+                'verbose_name': 'удалённый объект',
+                'verbose_name_plural': 'Удалённые объекты',
+                'ordering': ('-deleted_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deletion',
+            index=models.Index(fields=['model', 'deleted_at'], name='deletion_model_deleted_at_idx'),
+        ),
+    ]
@@ -1,13 +1,31 @@
+from hashlib import md5
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
+from django.utils.timezone import now
 
-from .constants import LENGTH_COMMENT_FIELD, MAX_LENGTH_FIELD
-from blog.managers import PostManager, PostQuerySet
+from .constants import (
+    LENGTH_COMMENT_FIELD,
+    MAX_LENGTH_FIELD,
+    PROCESS_IMAGE_JOB,
+)
+from .images import ImageVariantsMixin
+from blog.managers import (
+    FeedEntryManager,
+    JobManager,
+    PostManager,
+    PostQuerySet,
+)
 
 User = get_user_model()
 
 
+def hash_card_values(*values):
+    """Возвращает короткий хэш отображаемых в карточке значений."""
+    return md5(repr(values).encode()).hexdigest()
+
+
 class DefaultPostSettingsModel(models.Model):
     """Универсальная абстрактная модель для модели постов."""
 
@@ -22,7 +40,29 @@ class DefaultPostSettingsModel(models.Model):
         abstract = True
 
 
-class Category(DefaultPostSettingsModel):
+class TrackedPostSettingsModel(DefaultPostSettingsModel):
+    """
+    Абстрактная модель с отметкой времени последнего изменения.
+    Изменения комментариев отмечаются в посте, к которому они относятся.
+    """
+
+    updated_at = models.DateTimeField(default=now, editable=False,
+                                      verbose_name='Изменено')
+
+    class Meta(DefaultPostSettingsModel.Meta):
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        Отмечает время изменения. Загрузка фикстур этот метод не
+        вызывает и сохраняет время из фикстуры, а без него — момент
+        загрузки.
+        """
+        self.updated_at = now()
+        super().save(*args, **kwargs)
+
+
+class Category(TrackedPostSettingsModel):
     """Модель категории для постов."""
 
     title = models.CharField(
@@ -39,7 +79,7 @@ class Category(DefaultPostSettingsModel):
         )
     )
 
-    class Meta(DefaultPostSettingsModel.Meta):
+    class Meta(TrackedPostSettingsModel.Meta):
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
 
@@ -47,7 +87,7 @@ class Category(DefaultPostSettingsModel):
         return self.title
 
 
-class Location(DefaultPostSettingsModel):
+class Location(TrackedPostSettingsModel):
     """Модель местоположения для постов."""
 
     name = models.CharField(
@@ -55,7 +95,7 @@ class Location(DefaultPostSettingsModel):
         verbose_name='Название места'
     )
 
-    class Meta(DefaultPostSettingsModel.Meta):
+    class Meta(TrackedPostSettingsModel.Meta):
         verbose_name = 'местоположение'
         verbose_name_plural = 'Местоположения'
 
@@ -63,7 +103,7 @@ class Location(DefaultPostSettingsModel):
         return self.name
 
 
-class Post(DefaultPostSettingsModel):
+class Post(ImageVariantsMixin, TrackedPostSettingsModel):
     """Модель поста."""
 
     title = models.CharField(
@@ -100,23 +140,90 @@ class Post(DefaultPostSettingsModel):
         verbose_name='Фото',
         upload_to='blog_images',
         blank=True)
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name='Уменьшенные копии фото'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     objects = PostQuerySet.as_manager()
     postobj = PostManager()
 
-    class Meta(DefaultPostSettingsModel.Meta):
+    card_template = 'includes/post_card.html'
+
+    class Meta(TrackedPostSettingsModel.Meta):
         default_related_name = 'posts'
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True),
+                name='post_published_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                name='post_category_pub_date_idx'
+            ),
+            models.Index(
+                fields=('updated_at',),
+                name='post_updated_at_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        При загрузке нового фото сбрасывает уменьшенные копии и ставит
+        их создание в очередь: запрос не ждёт обработки изображения.
+        Пост и задача сохраняются в одной транзакции, чтобы новое фото
+        не осталось без копий из-за сбоя между ними.
+        """
+        new_image = bool(self.image) and not self.image._committed
+        if new_image or not self.image:
+            self.image_variants = {}
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'image_variants'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if new_image:
+                Job.objects.enqueue(
+                    PROCESS_IMAGE_JOB, post_id=self.pk, image=self.image.name
+                )
+
     def get_absolute_url(self):
         """Возвращает URL для детального просмотра поста."""
         return reverse('blog:post_detail', kwargs={'pk': self.pk})
 
+    @property
+    def card_version(self):
+        """
+        Версия карточки поста для кэша фрагментов.
+        Меняется вместе с любыми данными, которые выводит карточка.
+        """
+        category, location = self.category, self.location
+        return hash_card_values(
+            self.pk, self.title, self.text, self.pub_date, self.is_published,
+            self.image.name, self.image_variants, self.comment_count,
+            self.author.username,
+            category and (category.slug, category.title,
+                          category.is_published),
+            location and (location.name, location.is_published),
+        )
+
 
 class Comment(DefaultPostSettingsModel):
     """Модель комментария к посту."""
@@ -137,7 +244,220 @@ class Comment(DefaultPostSettingsModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        ordering = ('created_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         """Возвращает обрезанный текст комментария для отображения."""
         return self.text[:LENGTH_COMMENT_FIELD]
+
+
+class FeedEntry(ImageVariantsMixin, models.Model):
+    """
+    Предвычисленная запись ленты для опубликованного поста
+    в опубликованной категории. Хранит всё, что нужно карточке поста,
+    чтобы ленты читались из одной таблицы без соединений.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата и время публикации')
+    title = models.CharField(
+        max_length=MAX_LENGTH_FIELD,
+        verbose_name='Заголовок'
+    )
+    excerpt = models.TextField(verbose_name='Начало текста')
+    image = models.ImageField(
+        verbose_name='Фото',
+        upload_to='blog_images',
+        blank=True
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        verbose_name='Уменьшенные копии фото'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='+',
+        verbose_name='Автор публикации'
+    )
+    author_username = models.CharField(
+        max_length=150,
+        verbose_name='Имя пользователя автора'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    category_slug = models.SlugField(verbose_name='Идентификатор категории')
+    category_title = models.CharField(
+        max_length=MAX_LENGTH_FIELD,
+        verbose_name='Заголовок категории'
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Местоположение'
+    )
+    location_name = models.CharField(
+        max_length=MAX_LENGTH_FIELD,
+        blank=True,
+        verbose_name='Название места'
+    )
+
+    objects = FeedEntryManager()
+
+    card_template = 'includes/feed_card.html'
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date', '-post_id')
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'post'),
+                name='feed_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'post'),
+                name='feed_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date', 'post'),
+                name='feed_category_pub_date_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def card_version(self):
+        """Версия карточки записи ленты для кэша фрагментов."""
+        return hash_card_values(
+            self.pk, self.title, self.excerpt, self.pub_date, self.image.name,
+            self.image_variants, self.comment_count, self.author_username,
+            self.category_slug, self.category_title, self.location_name,
+        )
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди, которую выполняют воркеры."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField(max_length=64, verbose_name='Вид задачи')
+    payload = models.JSONField(default=dict, verbose_name='Параметры')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    run_after = models.DateTimeField(
+        default=now,
+        verbose_name='Не раньше'
+    )
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Добавлено')
+    started_at = models.DateTimeField(null=True, verbose_name='Начата')
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        verbose_name='Последний сигнал воркера'
+    )
+    finished_at = models.DateTimeField(null=True, verbose_name='Завершена')
+
+    objects = JobManager()
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='job_status_run_after_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}'
+
+
+class ImageBlob(models.Model):
+    """Счётчик ссылок постов на файл изображения в хранилище."""
+
+    name = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name='Имя файла'
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество ссылок'
+    )
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return self.name
+
+
+class Deletion(models.Model):
+    """Отметка об удалённом объекте для инкрементальной выгрузки."""
+
+    model = models.CharField(max_length=100, verbose_name='Модель')
+    object_pk = models.BigIntegerField(verbose_name='Ключ объекта')
+    deleted_at = models.DateTimeField(default=now, verbose_name='Удалён')
+
+    class Meta:
+        verbose_name = 'удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+        ordering = ('-deleted_at',)
+        indexes = (
+            models.Index(
+                fields=('model', 'deleted_at'),
+                name='deletion_model_deleted_at_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.model} #{self.object_pk}'
@@ -0,0 +1,237 @@
+import atexit
+import logging
+import re
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .constants import SLOW_QUERY_LOG_BACKUP_COUNT, SLOW_QUERY_LOG_MAX_BYTES
+
+logger = logging.getLogger('blog.slow_queries')
+nplusone_logger = logging.getLogger('blog.nplusone')
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """Приводит SQL к общему виду: без литералов, параметров и пробелов."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else 'unresolved'
+
+
+def explain(connection, sql, params):
+    """Возвращает план запроса или текст ошибки, если его не получить."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params
+            )
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except DatabaseError as error:
+        return f'EXPLAIN недоступен: {error}'
+
+
+class SlowQueryLogger:
+    """Обёртка выполнения SQL, записывающая медленные запросы в лог."""
+
+    def __init__(self, request, connection, threshold):
+        self.request = request
+        self.connection = connection
+        self.threshold = threshold
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        start = perf_counter()
+        result = execute(sql, params, many, context)
+        duration = perf_counter() - start
+        if duration >= self.threshold:
+            self.log(sql, params, many, duration)
+        return result
+
+    def log(self, sql, params, many, duration):
+        plan = None
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            self.explaining = True
+            try:
+                plan = explain(self.connection, sql, params)
+            finally:
+                self.explaining = False
+        if settings.BLOG_SLOW_QUERY_LOG:
+            start_slow_query_log(settings.BLOG_SLOW_QUERY_LOG)
+        logger.warning(
+            'Медленный запрос %.1f мс во view %s: %s',
+            duration * 1000, view_name(self.request), fingerprint(sql),
+            extra={
+                'duration': duration,
+                'view': view_name(self.request),
+                'fingerprint': fingerprint(sql),
+                'sql': sql,
+                'plan': plan,
+            },
+        )
+
+
+class SlowQueryMiddleware:
+    """
+    Логирует запросы дольше BLOG_SLOW_QUERY_THRESHOLD_MS вместе
+    с отпечатком, именем view и планом выполнения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.BLOG_SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return self.get_response(request)
+        wrappers = [
+            (connection, SlowQueryLogger(
+                request, connection, threshold / 1000
+            ))
+            for connection in connections.all()
+        ]
+        for connection, wrapper in wrappers:
+            connection.execute_wrappers.append(wrapper)
+        try:
+            return self.get_response(request)
+        finally:
+            for connection, wrapper in wrappers:
+                connection.execute_wrappers.remove(wrapper)
+
+
+class NPlusOneError(Exception):
+    """Во время запроса повторялись запросы одинаковой формы."""
+
+
+class QueryShapeCounter:
+    """Обёртка выполнения SQL, считающая SELECT по отпечаткам."""
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            self.shapes[fingerprint(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= threshold
+        }
+
+
+class NPlusOneMiddleware:
+    """
+    Ищет N+1: SELECT одной формы, выполненные за запрос
+    BLOG_NPLUSONE_THRESHOLD раз и более. В режиме 'log' пишет
+    предупреждение, в режиме 'raise' выбрасывает NPlusOneError.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.BLOG_NPLUSONE_MODE
+        if mode is None:
+            return self.get_response(request)
+        counter = QueryShapeCounter()
+        for connection in connections.all():
+            connection.execute_wrappers.append(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            for connection in connections.all():
+                connection.execute_wrappers.remove(counter)
+        repeated = counter.repeated(settings.BLOG_NPLUSONE_THRESHOLD)
+        if repeated:
+            self.report(request, mode, repeated)
+        return response
+
+    def report(self, request, mode, repeated):
+        details = '\n'.join(
+            f'  {count} × {shape}' for shape, count in repeated.items()
+        )
+        message = (
+            f'Повторяющиеся запросы во view {view_name(request)}:\n'
+            f'{details}'
+        )
+        if mode == 'raise':
+            raise NPlusOneError(message)
+        nplusone_logger.warning(message)
+
+
+class SlowQueryFormatter(logging.Formatter):
+    """Дописывает к сообщению полный SQL и план выполнения."""
+
+    def format(self, record):
+        message = super().format(record)
+        sql = getattr(record, 'sql', None)
+        if sql:
+            message += f'\n  SQL: {sql}'
+        plan = getattr(record, 'plan', None)
+        if plan:
+            message += '\n  PLAN:\n    ' + plan.replace('\n', '\n    ')
+        return message
+
+
+_listener = None
+_listener_lock = Lock()
+
+
+def start_slow_query_log(path):
+    """
+    Подключает к логгеру медленных запросов очередь, которую
+    фоновый поток пишет в ротируемый файл: потоки запросов
+    не ждут файлового ввода-вывода. Вызывается при первом медленном
+    запросе, поэтому процессы без них не создают ни файла, ни потока.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = slow_query_listener(Path(path))
+    return _listener
+
+
+def slow_query_listener(path):
+    """Запускает поток, пишущий очередь логгера в ротируемый файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        path,
+        maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=SLOW_QUERY_LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True,
+    )
+    file_handler.setFormatter(SlowQueryFormatter(
+        '%(asctime)s %(levelname)s %(message)s'
+    ))
+    queue = SimpleQueue()
+    logger.addHandler(QueueHandler(queue))
+    listener = QueueListener(queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
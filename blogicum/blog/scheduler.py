@@ -0,0 +1,101 @@
+import logging
+from datetime import timedelta
+from threading import Event, Thread
+
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils.timezone import now
+
+from .constants import (PAGE_CACHE_TIMEOUT, SCHEDULER_LAST_FIRED_KEY,
+                        SCHEDULER_MAX_SLEEP)
+from blog.models import Post
+
+logger = logging.getLogger(__name__)
+
+post_became_visible = Signal()
+
+
+class PublicationScheduler:
+    """
+    Планировщик отложенных публикаций.
+    Спит до ближайшей `pub_date` и в этот момент отправляет сигнал
+    `post_became_visible` для каждого поста, ставшего видимым.
+    """
+
+    def __init__(self, max_sleep=SCHEDULER_MAX_SLEEP):
+        self.max_sleep = max_sleep
+        self._wakeup = Event()
+        self._stop = Event()
+        self._thread = None
+
+    @property
+    def last_fired(self):
+        """
+        Момент, до которого события уже отправлены. Отметка хранится
+        в общем кэше, поэтому её видят все процессы. Если она потеряна,
+        события повторяются за время жизни кэша страниц: повторный сброс
+        безвреден, а пропущенный оставил бы ленты устаревшими.
+        """
+        return cache.get_or_set(
+            SCHEDULER_LAST_FIRED_KEY,
+            lambda: now() - timedelta(seconds=PAGE_CACHE_TIMEOUT),
+            None,
+        )
+
+    def run_pending(self):
+        """
+        Отправляет события для постов, ставших видимыми
+        с прошлого запуска. Возвращает дату следующей публикации.
+        """
+        since, until = self.last_fired, now()
+        posts = Post.objects.filter(
+            is_published=True, pub_date__gt=since, pub_date__lte=until
+        ).only('pk', 'pub_date', 'author_id', 'category_id')
+        for post in posts.order_by('pub_date'):
+            post_became_visible.send(sender=Post, post=post)
+        cache.set(SCHEDULER_LAST_FIRED_KEY, until, None)
+        return Post.postobj.get_next_publication_date()
+
+    def seconds_until(self, next_date):
+        """Время сна до следующей публикации, но не дольше `max_sleep`."""
+        if next_date is None:
+            return self.max_sleep
+        seconds = (next_date - now()).total_seconds()
+        return min(self.max_sleep, max(0, seconds))
+
+    def run_forever(self):
+        """Основной цикл планировщика."""
+        while not self._stop.is_set():
+            try:
+                next_date = self.run_pending()
+            except Exception:
+                logger.exception('Ошибка планировщика публикаций')
+                next_date = None
+            self._wakeup.wait(self.seconds_until(next_date))
+            self._wakeup.clear()
+
+    def wake(self):
+        """Пересчитывает время сна, например после нового поста."""
+        self._wakeup.set()
+
+    def start(self):
+        """Запускает планировщик в фоновом потоке текущего процесса."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(
+                target=self.run_forever,
+                name='publication-scheduler',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновый поток."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+scheduler = PublicationScheduler()
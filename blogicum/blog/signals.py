@@ -0,0 +1,325 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from blog.blobs import blob_names, change_refs
+from blog.cache import (invalidate_all_feed_counts, invalidate_feed_pages,
+                        invalidate_feeds, invalidate_pages,
+                        invalidate_post_pages)
+from blog.counters import recount_post_comments
+from blog.jobs import worker
+from blog.models import (Category, Comment, Deletion, FeedEntry, Job, Location,
+                         Post, User)
+from blog.scheduler import post_became_visible, scheduler
+
+PROFILE_FIELDS = ('username', 'first_name', 'last_name', 'is_staff')
+
+CATEGORY_FEED_FIELDS = ('slug', 'title', 'is_published')
+
+
+def change_comment_count(post_id, delta):
+    """
+    Атомарно изменяет счётчик комментариев поста на `delta`
+    и отмечает пост изменённым. Счётчик не уходит ниже нуля, даже
+    если он не учитывал комментарий, например загруженный фикстурой.
+    """
+    if post_id is not None:
+        posts = Post.objects.filter(pk=post_id)
+        entries = FeedEntry.objects.filter(post_id=post_id)
+        if delta < 0:
+            posts = posts.filter(comment_count__gt=0)
+            entries = entries.filter(comment_count__gt=0)
+        posts.update(
+            comment_count=F('comment_count') + delta,
+            updated_at=now(),
+        )
+        entries.update(comment_count=F('comment_count') + delta)
+        feeds = Post.objects.filter(pk=post_id).values_list(
+            'category_id', 'author_id'
+        ).first()
+        if feeds:
+            category_id, author_id = feeds
+            invalidate_feed_pages({category_id}, {author_id})
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    """Запоминает прежний пост комментария перед изменением."""
+    instance._previous_post_id = None
+    if instance.pk and not raw:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, raw, **kwargs):
+    """
+    Учитывает новый или перенесённый в другой пост комментарий.
+    Изменение текста комментария отмечает пост изменённым.
+    При загрузке фикстур счётчик поста пересчитывается целиком.
+    """
+    if raw:
+        if recount_post_comments(instance.post_id):
+            FeedEntry.objects.refresh_posts([instance.post_id])
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif previous_post_id and previous_post_id != instance.post_id:
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        Post.objects.filter(pk=instance.post_id).update(updated_at=now())
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик при удалении комментария, в том числе каскадном."""
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw, **kwargs):
+    """
+    Запоминает прежние категорию, автора и файлы изображений поста
+    перед изменением.
+    """
+    instance._previous_feeds = (None, None)
+    instance._previous_blobs = set()
+    if instance.pk and not raw:
+        category_id, author_id, image, variants = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('category_id', 'author_id', 'image',
+                         'image_variants').first()
+            or (None, None, None, None)
+        )
+        instance._previous_feeds = (category_id, author_id)
+        instance._previous_blobs = blob_names(image, variants)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_feeds(sender, instance, **kwargs):
+    """
+    Сбрасывает счётчики и страницы лент,
+    в которые входит (или входил) пост.
+    """
+    category_id, author_id = getattr(
+        instance, '_previous_feeds', (None, None)
+    )
+    invalidate_feeds(
+        category_ids={instance.category_id, category_id},
+        author_ids={instance.author_id, author_id},
+    )
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw, **kwargs):
+    """
+    Запоминает прежние slug, заголовок и публикацию категории
+    перед изменением: от них зависят записи ленты.
+    """
+    instance._previous_slug = None
+    instance._previous_feed_fields = None
+    if instance.pk and not raw:
+        previous = (
+            Category.objects.filter(pk=instance.pk)
+            .values_list(*CATEGORY_FEED_FIELDS).first()
+        )
+        if previous is not None:
+            instance._previous_slug = previous[0]
+            instance._previous_feed_fields = previous
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def reset_category_feeds(sender, instance, **kwargs):
+    """
+    Публикация категории влияет на ленты всех её авторов,
+    поэтому сбрасываются все счётчики и страницы этих авторов.
+    """
+    invalidate_all_feed_counts()
+    invalidate_pages(
+        {instance.slug, getattr(instance, '_previous_slug', None)} - {None},
+        Post.objects.filter(category=instance)
+        .values_list('author__username', flat=True).distinct(),
+    )
+
+
+@receiver(post_save, sender=Post)
+def recount_loaded_post_comments(sender, instance, raw, **kwargs):
+    """
+    Пост из фикстуры получает счётчик по уже загруженным комментариям.
+    Регистрируется раньше обновления ленты, чтобы та взяла этот счётчик.
+    """
+    if raw:
+        recount_post_comments(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_feed_entry(sender, instance, **kwargs):
+    """Добавляет, обновляет или убирает пост из ленты."""
+    FeedEntry.objects.refresh_posts([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_feed_entries(sender, instance, **kwargs):
+    """
+    Обновляет ленту для постов изменённой категории: смена публикации
+    перестраивает записи, смена slug или заголовка переписывает их
+    одним запросом, а правка только описания ленту не трогает.
+    """
+    previous = getattr(instance, '_previous_feed_fields', None)
+    current = tuple(
+        getattr(instance, field) for field in CATEGORY_FEED_FIELDS
+    )
+    if previous is None or previous[2] != current[2]:
+        FeedEntry.objects.refresh_where(category=instance)
+    elif previous != current:
+        FeedEntry.objects.filter(category=instance).update(
+            category_slug=instance.slug, category_title=instance.title
+        )
+
+
+def reset_location_pages(location):
+    """Сбрасывает страницы лент, в которых есть посты с этим местом."""
+    entries = FeedEntry.objects.filter(location=location)
+    invalidate_pages(
+        entries.values_list('category_slug', flat=True).distinct(),
+        entries.values_list('author_username', flat=True).distinct(),
+    )
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_feed_entries(sender, instance, **kwargs):
+    """Обновляет название места в записях ленты."""
+    FeedEntry.objects.filter(location=instance).update(
+        location_name=instance.name if instance.is_published else ''
+    )
+    reset_location_pages(instance)
+
+
+@receiver(pre_delete, sender=Location)
+def clear_location_feed_entries(sender, instance, **kwargs):
+    """Убирает название удаляемого места из записей ленты."""
+    reset_location_pages(instance)
+    FeedEntry.objects.filter(location=instance).update(location_name='')
+
+
+@receiver(pre_save, sender=User)
+def remember_profile(sender, instance, raw, update_fields, **kwargs):
+    """
+    Запоминает отображаемые в профиле данные перед изменением.
+    Обновление только `last_login` при входе пропускается.
+    """
+    instance._previous_profile = None
+    if not instance.pk or raw:
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    instance._previous_profile = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*PROFILE_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def reset_profile_pages(sender, instance, **kwargs):
+    """
+    Сбрасывает страницу профиля при изменении его данных,
+    а при смене имени — и ленты с карточками постов автора,
+    и страницы постов с его комментариями.
+    """
+    previous = getattr(instance, '_previous_profile', None)
+    current = tuple(getattr(instance, field) for field in PROFILE_FIELDS)
+    if previous is None or previous == current:
+        return
+    usernames = {previous[0], instance.username}
+    category_slugs = ()
+    if previous[0] != instance.username:
+        category_slugs = (
+            FeedEntry.objects.filter(author=instance)
+            .values_list('category_slug', flat=True).distinct()
+        )
+        invalidate_post_pages(
+            Comment.objects.filter(author=instance)
+            .values_list('post_id', flat=True).distinct()
+        )
+    invalidate_pages(category_slugs, usernames)
+
+
+@receiver(post_save, sender=User)
+def refresh_author_feed_entries(sender, instance, raw, **kwargs):
+    """
+    Обновляет имя автора в записях ленты.
+    При загрузке фикстур автор может появиться позже своих постов,
+    поэтому его посты добавляются в ленту заново.
+    """
+    if raw:
+        FeedEntry.objects.refresh_where(author=instance)
+        return
+    FeedEntry.objects.filter(author=instance).exclude(
+        author_username=instance.username
+    ).update(author_username=instance.username)
+
+
+@receiver(post_save, sender=Post)
+def update_image_refs(sender, instance, raw, created, **kwargs):
+    """
+    Переносит ссылки со старых файлов изображений поста на новые.
+    При загрузке фикстур прежнее состояние неизвестно, поэтому
+    учитываются только новые посты.
+    """
+    if raw and not created:
+        return
+    change_refs(
+        blob_names(instance.image, instance.image_variants),
+        getattr(instance, '_previous_blobs', set()),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def release_image_refs(sender, instance, **kwargs):
+    """Освобождает файлы изображений удалённого поста."""
+    change_refs(removed=blob_names(instance.image, instance.image_variants))
+
+
+@receiver(post_save, sender=Post)
+def wake_publication_scheduler(sender, instance, **kwargs):
+    """Будит планировщик, если появилась новая отложенная публикация."""
+    if instance.pub_date > now():
+        scheduler.wake()
+
+
+@receiver(post_became_visible, sender=Post)
+def reset_published_post_feeds(sender, post, **kwargs):
+    """Сбрасывает счётчики и страницы лент с появившимся постом."""
+    invalidate_feeds(
+        category_ids={post.category_id}, author_ids={post.author_id}
+    )
+
+
+@receiver(post_save, sender=Job)
+def wake_job_worker(sender, instance, created, **kwargs):
+    """
+    Новая задача будит воркер, если он запущен в этом процессе, —
+    после коммита, когда воркер уже увидит её строку.
+    """
+    if created:
+        transaction.on_commit(worker.wake)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def record_deletion(sender, instance, **kwargs):
+    """Запоминает удаление для инкрементальной выгрузки."""
+    Deletion.objects.create(
+        model=sender._meta.label_lower, object_pk=instance.pk
+    )
@@ -0,0 +1,141 @@
+import gzip
+import json
+import os
+import posixpath
+from hashlib import sha256
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .constants import (
+    STATIC_COMPRESS_EXTENSIONS,
+    STATIC_COMPRESS_MIN_SIZE,
+    STATIC_ENCODINGS,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — хэш его содержимого.
+    Каталог и расширение берутся из запрошенного имени, а одинаковые
+    файлы записываются один раз: повторная загрузка получает имя
+    уже сохранённого блоба.
+    """
+
+    def content_name(self, name, content):
+        digest = sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], f'{digest}{extension}'
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Свежая отметка времени защищает блоб от сборщика мусора,
+            # пока новая ссылка на него ещё не сохранена.
+            os.utime(self.path(name))
+            return name
+        saved = super()._save(name, content)
+        if saved != name:
+            # Тот же блоб параллельно записал другой процесс.
+            self.delete(saved)
+        return name
+
+    def walk(self, path=''):
+        """
+        Перебирает имена всех файлов по одному каталогу за раз,
+        поэтому память не зависит от общего числа файлов.
+        """
+        if not self.exists(path):
+            return
+        directories, files = self.listdir(path)
+        for file_name in files:
+            yield posixpath.join(path, file_name)
+        for directory in directories:
+            yield from self.walk(posixpath.join(path, directory))
+
+
+def compress(data, encoding):
+    """Сжимает данные; None, если кодировщик недоступен."""
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, mode=brotli.MODE_TEXT)
+    return None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика с хэшем содержимого в именах и заранее сжатыми копиями.
+    Рядом с каждым текстовым файлом collectstatic кладёт `.br`
+    (если установлен brotli) и `.gz`, а список копий сохраняет
+    в манифесте под ключом `encodings`.
+    """
+
+    def load_manifest(self):
+        paths = super().load_manifest()
+        content = self.read_manifest()
+        stored = json.loads(content) if content else {}
+        self.encodings = stored.get('encodings', {})
+        self.hashed_names = set(paths.values())
+        return paths
+
+    def stored_name(self, name):
+        # До первой сборки манифеста нет: отдаём исходные имена,
+        # чтобы сайт и тесты работали без collectstatic.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        self.encodings = {}
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            self.hashed_names = set(self.hashed_files.values())
+            self.compress_files()
+            self.save_manifest()
+
+    def compress_files(self):
+        """Записывает сжатые копии файлов с хэшем в имени."""
+        for name in sorted(self.hashed_names):
+            if not name.endswith(STATIC_COMPRESS_EXTENSIONS):
+                continue
+            with self.open(name) as file:
+                data = file.read()
+            if len(data) < STATIC_COMPRESS_MIN_SIZE:
+                continue
+            for encoding, suffix in STATIC_ENCODINGS:
+                compressed = compress(data, encoding)
+                if compressed is None or len(compressed) >= len(data):
+                    continue
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
+                self.encodings.setdefault(name, []).append(encoding)
+
+    def save_manifest(self):
+        payload = {
+            'paths': self.hashed_files,
+            'encodings': self.encodings,
+            'version': self.manifest_version,
+        }
+        if self.exists(self.manifest_name):
+            self.delete(self.manifest_name)
+        self._save(
+            self.manifest_name, ContentFile(json.dumps(payload).encode())
+        )
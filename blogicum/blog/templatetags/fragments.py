@@ -0,0 +1,14 @@
+from django import template
+
+from blog.fragments import placeholder
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment(name, **params):
+    """
+    Ставит метку фрагмента, зависящего от пользователя:
+    её заполнит FragmentMiddleware уже после кэша страниц.
+    """
+    return placeholder(name, **params)
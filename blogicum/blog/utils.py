@@ -1,16 +1,201 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from functools import wraps
+
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import feed_count_timeout
+from .constants import (CURSOR_SEPARATOR, PAGINATOR_ON_EACH_SIDE,
+                        PAGINATOR_ON_ENDS, POSTS_PER_PAGE)
+
+
+def encode_cursor(obj, field='pub_date'):
+    """Возвращает непрозрачный токен курсора (дата, id) для объекта."""
+    raw = f'{getattr(obj, field).isoformat()}{CURSOR_SEPARATOR}{obj.pk}'
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Разбирает токен курсора в пару (дата, id).
+    Для некорректного токена возвращает None.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (Base64Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage:
+    """
+    Страница, выбранная по курсору (дата, id)
+    без подсчёта общего количества записей и без OFFSET.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 field='pub_date'):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.field = field
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1], self.field)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0], self.field)
+        return None
+
+
+def cursor_queryset(queryset, after=None, before=None, field='pub_date',
+                    descending=True):
+    """
+    Ограничивает выборку объектами после (или до) курсора
+    и сортирует их в направлении обхода.
+    Условие записано через диапазон по дате,
+    чтобы база читала индекс по порядку, а не объединяла два индекса.
+    """
+    if after is None and before is None:
+        sign = '-' if descending else ''
+        return queryset.order_by(f'{sign}{field}', f'{sign}pk')
+    value, pk = before if before is not None else after
+    ascending = descending == (before is not None)
+    lookup, sign = ('gt', '') if ascending else ('lt', '-')
+    return queryset.filter(
+        Q(**{f'{field}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk}),
+        **{f'{field}__{lookup}e': value},
+    ).order_by(f'{sign}{field}', f'{sign}pk')
+
+
+def paginate_cursor(queryset, after=None, before=None,
+                    per_page=POSTS_PER_PAGE, field='pub_date',
+                    descending=True):
+    """
+    Возвращает страницу объектов после (или до) курсора.
+    Использует индексируемое условие по (дата, id) вместо OFFSET.
+    """
+    objects = list(cursor_queryset(
+        queryset, after, before, field, descending
+    )[:per_page + 1])
+    has_more = len(objects) > per_page
+    objects = objects[:per_page]
+    if before is not None:
+        return CursorPage(objects[::-1], True, has_more, field)
+    return CursorPage(objects, has_more, after is not None, field)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который берёт общее количество объектов из кэша.
+    Счётчики сбрасываются сигналами изменения постов и категорий.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, feed_count_timeout())
+        return count
+
+
+def paginate_query(request, queryset, count_key=None,
+                   per_page=POSTS_PER_PAGE):
+    """
+    Возвращает пагинированные данные для переданного запроса.
+    При наличии параметров `after`/`before` переключается в режим курсора.
+    """
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+    if after is not None or before is not None:
+        return paginate_cursor(queryset, after, before, per_page)
+    paginator = CachedCountPaginator(queryset, per_page, count_key)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.page_window = list(paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=PAGINATOR_ON_EACH_SIDE,
+        on_ends=PAGINATOR_ON_ENDS,
+    ))
+    if page_obj.has_next():
+        page_obj.next_cursor = encode_cursor(page_obj[-1])
+    return page_obj
 
-from .constants import POSTS_PER_PAGE
 
+def author_required(model, related=(), **url_lookups):
+    """
+    Загружает объект один раз, проверяет, что его автор — текущий
+    пользователь, и передаёт объект в представление как `instance`.
+    `url_lookups` сопоставляют поля модели с аргументами URL.
+    Не автора перенаправляет на страницу поста.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, post_id, **kwargs):
+            url_kwargs = {'post_id': post_id, **kwargs}
+            queryset = model.objects.all()
+            if related:
+                # Без аргументов select_related() присоединил бы
+                # все внешние ключи модели.
+                queryset = queryset.select_related(*related)
+            instance = get_object_or_404(
+                queryset,
+                **{field: url_kwargs[kwarg]
+                   for field, kwarg in url_lookups.items()},
+            )
+            if instance.author_id != request.user.pk:
+                return redirect('blog:post_detail', post_id=post_id)
+            return view(request, post_id, instance=instance, **kwargs)
+        return wrapper
+    return decorator
 
-def paginate_query(request, queryset, per_page=POSTS_PER_PAGE):
-    """Возвращает пагинированные данные для переданного запроса."""
-    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
 
+def setup_worker_process():
+    """Процесс-исполнитель открывает собственные соединения с базой."""
+    import django
 
-def check_author(request, model, id):
-    instance = get_object_or_404(model, id=id)
-    if instance.author != request.user:
-        return redirect('blog:post_detail', post_id=id)
-    return None
+    django.setup()
+    connections.close_all()
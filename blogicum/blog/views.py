@@ -1,34 +1,91 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .cache import (AUTHOR_ALL_FEED, AUTHOR_FEED, CATEGORY_FEED, INDEX_FEED,
+                    POST_PAGE, cache_anonymous_page, cache_shared_page,
+                    feed_count_key, page_tag)
+from .conditional import (feed_condition, post_detail_condition,
+                          post_detail_variant)
+from .constants import COMMENTS_PER_PAGE
 from .forms import CommentForm, PostForm, UserForm
-from .models import Category, Comment, Post, User
-from .utils import paginate_query, check_author
+from .models import Category, Comment, FeedEntry, Post, User
+from .utils import (author_required, decode_cursor, paginate_cursor,
+                    paginate_query)
 
 
+@feed_condition(
+    lambda: page_tag(INDEX_FEED),
+    lambda request: FeedEntry.objects.get_for_index(),
+)
+@cache_shared_page(lambda: page_tag(INDEX_FEED))
 def index(request):
     """Отображает главную страницу с пагинированными постами."""
-    page_obj = paginate_query(request, Post.postobj.get_for_index())
+    page_obj = paginate_query(
+        request, FeedEntry.objects.get_for_index(), feed_count_key(INDEX_FEED)
+    )
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
+@post_detail_condition
+@cache_shared_page(
+    lambda post_id: page_tag(POST_PAGE, post_id),
+    post_detail_variant,
+    scheduled=False,
+)
 def post_detail(request, post_id):
     """
     Отображает страницу с подробной информацией о посте
     и комментариями к нему.
     """
-    post = get_object_or_404(Post.postobj.all(), id=post_id)
-    if not post.author == request.user:
-        post = get_object_or_404(Post.postobj.get_pub(), id=post_id)
-    comments = post.comments.select_related('author')
-    context = {'post': post, 'comments': comments, 'form': CommentForm()}
+    post = get_object_or_404(
+        Post.postobj.get_for_detail(request.user), id=post_id
+    )
+    comments = paginate_cursor(
+        post.comments.select_related('author'),
+        per_page=COMMENTS_PER_PAGE,
+        field='created_at',
+        descending=False,
+    )
+    context = {'post': post, 'comments': comments}
     return render(request, 'blog/detail.html', context)
 
 
+def post_comments(request, post_id):
+    """
+    Отдаёт фрагмент HTML со следующей порцией комментариев поста
+    после курсора `after`.
+    """
+    post = get_object_or_404(
+        Post.postobj.get_for_detail(request.user), id=post_id
+    )
+    comments = paginate_cursor(
+        post.comments.select_related('author'),
+        after=decode_cursor(request.GET.get('after', '')),
+        per_page=COMMENTS_PER_PAGE,
+        field='created_at',
+        descending=False,
+    )
+    context = {'post': post, 'comments': comments}
+    return render(request, 'includes/comment_list.html', context)
+
+
+@feed_condition(
+    lambda category_slug: page_tag(CATEGORY_FEED, category_slug),
+    lambda request, category_slug: FeedEntry.objects.get_for_index().filter(
+        category__slug=category_slug
+    ),
+)
+@cache_shared_page(
+    lambda category_slug: page_tag(CATEGORY_FEED, category_slug)
+)
 def category_posts(request, category_slug):
     """Отображает посты для конкретной категории."""
     cat = get_object_or_404(Category, slug=category_slug, is_published=True)
-    page_obj = paginate_query(request, Post.postobj.get_for_category(cat))
+    page_obj = paginate_query(
+        request,
+        FeedEntry.objects.get_for_category(cat),
+        feed_count_key(CATEGORY_FEED, cat.id),
+    )
     context = {'category': cat, 'page_obj': page_obj}
     return render(request, 'blog/category.html', context)
 
@@ -48,47 +105,55 @@ def create_post(request):
     return render(request, 'blog/create.html', {'form': form})
 
 
-def edit_post(request, post_id):
+@author_required(Post, pk='post_id')
+def edit_post(request, post_id, instance):
     """
     Редактирует существующий пост.
     Пользователь должен быть автором поста.
     """
-    instance = get_object_or_404(Post, id=post_id)
-    author_post_check = check_author(request, Post, id=post_id)
-    if author_post_check is None:
-        form = PostForm(request.POST or None,
-                        files=request.FILES or None,
-                        instance=instance)
-        if form.is_valid():
-            form.save()
-            return redirect('blog:post_detail', post_id)
-        return render(request, 'blog/create.html', {'form': form})
-    return author_post_check
-
-
-def delete_post(request, post_id):
+    form = PostForm(request.POST or None,
+                    files=request.FILES or None,
+                    instance=instance)
+    if form.is_valid():
+        form.save()
+        return redirect('blog:post_detail', post_id)
+    return render(request, 'blog/create.html', {'form': form})
+
+
+@author_required(Post, related=('location',), pk='post_id')
+def delete_post(request, post_id, instance):
     """Удаляет пост. Пользователь должен быть автором поста."""
-    instance = get_object_or_404(Post, id=post_id)
-    author_post_check = check_author(request, Post, id=post_id)
-    if author_post_check is None:
-        form = PostForm(request.POST or None,
-                        files=request.FILES or None,
-                        instance=instance)
-        if request.method == 'POST':
-            instance.delete()
-            return redirect('blog:profile', username=request.user.username)
-        return render(request, 'blog/create.html', {'form': form})
-    return author_post_check
+    form = PostForm(instance=instance)
+    if request.method == 'POST':
+        instance.delete()
+        return redirect('blog:profile', username=request.user.username)
+    return render(request, 'blog/create.html', {'form': form})
 
 
+@feed_condition(
+    lambda username: page_tag(AUTHOR_FEED, username),
+    lambda request, username: (
+        Post.objects.filter(author__username=username)
+        if request.user.get_username() == username
+        else FeedEntry.objects.get_for_index().filter(
+            author__username=username
+        )
+    ),
+)
+@cache_anonymous_page(lambda username: page_tag(AUTHOR_FEED, username))
 def profile(request, username):
     """Отображает профиль пользователя с его постами."""
     user = get_object_or_404(User, username=username)
     if not user == request.user:
-        posts = Post.postobj.get_for_profile(user)
+        posts = FeedEntry.objects.get_for_profile(user)
+        count_key = feed_count_key(AUTHOR_FEED, user.id)
     else:
         posts = Post.postobj.get_for_profile_auth(user)
-    context = {'profile': user, 'page_obj': paginate_query(request, posts)}
+        count_key = feed_count_key(AUTHOR_ALL_FEED, user.id)
+    context = {
+        'profile': user,
+        'page_obj': paginate_query(request, posts, count_key),
+    }
     return render(request, 'blog/profile.html', context)
 
 
@@ -121,31 +186,25 @@ def add_comment(request, post_id):
 
 
 @login_required
-def edit_comment(request, post_id, comment_id):
+@author_required(Comment, pk='comment_id', post_id='post_id')
+def edit_comment(request, post_id, comment_id, instance):
     """
     Редактирует существующий комментарий.
     Пользователь должен быть автором комментария.
     """
-    comment = get_object_or_404(Comment, pk=comment_id)
-    author_comment_check = check_author(request, Comment, id=comment_id)
-    if author_comment_check is None:
-        form = CommentForm(request.POST or None, instance=comment)
-        context = {'form': form, 'comment': comment}
-        if form.is_valid():
-            form.save()
-            return redirect('blog:post_detail', post_id)
-        return render(request, 'blog/comment.html', context)
-    return author_comment_check
+    form = CommentForm(request.POST or None, instance=instance)
+    context = {'form': form, 'comment': instance}
+    if form.is_valid():
+        form.save()
+        return redirect('blog:post_detail', post_id)
+    return render(request, 'blog/comment.html', context)
 
 
 @login_required
-def delete_comment(request, post_id, comment_id):
+@author_required(Comment, pk='comment_id', post_id='post_id')
+def delete_comment(request, post_id, comment_id, instance):
     """Удаляет комментарий. Пользователь должен быть автором комментария."""
-    comment = get_object_or_404(Comment, pk=comment_id)
-    author_comment_check = check_author(request, Comment, id=comment_id)
-    if author_comment_check is None:
-        if request.method == 'POST':
-            comment.delete()
-            return redirect('blog:post_detail', post_id)
-        return render(request, 'blog/comment.html', {'comment': comment})
-    return author_comment_check
+    if request.method == 'POST':
+        instance.delete()
+        return redirect('blog:post_detail', post_id)
+    return render(request, 'blog/comment.html', {'comment': instance})
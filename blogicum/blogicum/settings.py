@@ -31,11 +31,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.metrics.PerformanceMiddleware',
+    'blog.queries.SlowQueryMiddleware',
+    'blog.queries.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.fragments.FragmentMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -51,15 +55,39 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 MEDIA_URL = 'media/'
 
+DEFAULT_FILE_STORAGE = 'blog.storage.ContentAddressedStorage'
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Кэш страниц, версии меток и счётчики лент должны быть общими для всех
+# процессов: сброс из одного воркера или команды виден остальным.
+# Версии меток хранятся отдельно и не вытесняются: их потеря оживила бы
+# сброшенные страницы. Ключей в нём по одному на ленту и пост.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10 ** 9,
+        },
+    },
+}
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -113,4 +141,31 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+STATICFILES_STORAGE = 'blog.storage.CompressedManifestStaticFilesStorage'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+BLOG_PUBLICATION_SCHEDULER_THREAD = False
+
+BLOG_JOBS_THREAD = False
+
+BLOG_SLOW_QUERY_THRESHOLD_MS = 100
+
+BLOG_SLOW_QUERY_LOG = BASE_DIR / 'logs' / 'slow_queries.log'
+
+BLOG_NPLUSONE_MODE = 'log'
+
+BLOG_NPLUSONE_THRESHOLD = 3
+
+# None — файлы отдаёт приложение; 'x-accel-redirect' — nginx,
+# 'x-sendfile' — Apache или lighttpd. Действует и для статики.
+BLOG_MEDIA_ACCEL = None
+
+BLOG_MEDIA_ACCEL_PREFIX = '/internal-media/'
+
+BLOG_STATIC_ACCEL_PREFIX = '/internal-static/'
+
+# True — фрагменты пользователя вставляет пограничный кэш по тегам ESI.
+BLOG_FRAGMENTS_ESI = False
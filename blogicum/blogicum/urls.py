@@ -1,10 +1,13 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.fragments import fragment_view
+from blog.media import serve_media, serve_static
+from blog.metrics import metrics_view
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.page_500'
 
@@ -21,8 +24,20 @@ urlpatterns = [
         name='registration',
     ),
     path('pages/', include('pages.urls', namespace='pages')),
+    path('metrics/', metrics_view, name='metrics'),
+    path('fragments/<slug:name>/', fragment_view, name='fragment'),
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+        serve_media,
+        name='media',
+    ),
+    re_path(
+        rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$',
+        serve_static,
+        name='static',
+    ),
     path('', include('blog.urls', namespace='blog'))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
 if settings.DEBUG:
     import debug_toolbar
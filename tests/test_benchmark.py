@@ -0,0 +1,58 @@
+import copy
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def results():
+    from blog.benchmark import run_benchmarks, seed_dataset
+
+    seed_dataset(users=5, posts=30, comments=90, chunk_size=7)
+    return run_benchmarks(requests=2)
+
+
+def test_seed_and_run_cover_every_route(results):
+    from blog.benchmark import routes
+
+    assert results["dataset"] == {"users": 5, "posts": 30, "comments": 90}
+    measured = {route.split()[0] for route in results["routes"]}
+    assert measured == {name for name, _ in routes()}, (
+        "Убедитесь, что замеряются все маршруты blog/urls.py и pages/urls.py."
+    )
+    assert results["routes"]["blog:post_detail anonymous"]["status"] == 200
+
+
+def test_cold_and_warm_cache_are_measured_separately(results):
+    route = results["routes"]["blog:index anonymous"]
+    assert route["warm"]["queries"] < route["cold"]["queries"], (
+        "Убедитесь, что замеры с пустым и заполненным кэшем разделены."
+    )
+
+
+def test_compare_flags_regressions(results):
+    from blog.benchmark import compare, make_baseline
+
+    baseline = make_baseline(results)
+    assert "p90_ms" not in baseline["routes"]["blog:index author"]["warm"], (
+        "Убедитесь, что эталон не хранит машинно-зависимые миллисекунды."
+    )
+    assert compare(results, baseline) == []
+
+    slower = copy.deepcopy(results)
+    route = slower["routes"]["blog:index author"]["warm"]
+    route["p90_ms"] = route["p90_ms"] * 2 + 100
+    route["queries"] += 1
+    assert len(compare(slower, baseline)) == 2
+
+    slower_machine = copy.deepcopy(slower)
+    slower_machine["reference_ms"] = results["reference_ms"] * 100
+    assert compare(slower_machine, baseline) == [
+        "blog:index author warm: запросов "
+        f"{route['queries']}, эталон {route['queries'] - 1}"
+    ], "Убедитесь, что задержки сравниваются в долях эталонной нагрузки."
+
+    other = copy.deepcopy(results)
+    other["dataset"]["posts"] += 1
+    assert compare(other, baseline)
@@ -0,0 +1,115 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_image(color=(10, 20, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 20), color=color).save(buffer, "PNG")
+    return ImageFile(buffer, name="photo.png")
+
+
+@pytest.fixture
+def make_post(mixer: Mixer, user, published_location, published_category):
+    def make(**kwargs):
+        return mixer.blend(
+            "blog.Post",
+            is_published=True,
+            location=published_location,
+            category=published_category,
+            author=user,
+            **kwargs,
+        )
+
+    return make
+
+
+def refcount(name):
+    from blog.models import ImageBlob
+
+    blob = ImageBlob.objects.filter(name=name).first()
+    return blob.refcount if blob else 0
+
+
+def test_same_upload_is_stored_once(make_post):
+    first = make_post(image=make_image())
+    second = make_post(image=make_image())
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые файлы сохраняются под одним именем."
+    )
+    assert refcount(first.image.name) == 2
+    other = make_post(image=make_image(color=(200, 0, 0)))
+    assert other.image.name != first.image.name
+
+
+def test_refcounts_follow_posts(make_post):
+    from blog.jobs import run_pending
+
+    post = make_post(image=make_image())
+    run_pending()
+    post.refresh_from_db()
+    names = {post.image.name} | {
+        variant["name"] for variant in post.image_variants.values()
+    }
+    assert all(refcount(name) == 1 for name in names)
+    post.image = make_image(color=(0, 200, 0))
+    post.save()
+    assert all(refcount(name) == 0 for name in names)
+    assert refcount(post.image.name) == 1
+    post.delete()
+    assert refcount(post.image.name) == 0
+
+
+def test_gc_removes_only_unreferenced_blobs(make_post, settings, tmp_path):
+    from django.core.files.storage import default_storage
+
+    settings.MEDIA_ROOT = tmp_path
+
+    kept = make_post(image=make_image()).image.name
+    dropped = make_post(image=make_image(color=(0, 0, 200)))
+    orphan = dropped.image.name
+    dropped.delete()
+    assert default_storage.exists(orphan)
+
+    call_command("gc_images", min_age=0, dry_run=True)
+    assert default_storage.exists(orphan), (
+        "Убедитесь, что `--dry-run` ничего не удаляет."
+    )
+    call_command("gc_images", min_age=3600)
+    assert default_storage.exists(orphan), (
+        "Убедитесь, что недавно записанные файлы не удаляются."
+    )
+    call_command("gc_images", min_age=0, batch_size=1)
+    assert not default_storage.exists(orphan)
+    assert default_storage.exists(kept)
+
+
+def test_recount_is_applied_in_one_transaction(make_post, monkeypatch):
+    from blog import blobs
+
+    names = [make_post(image=make_image(color=(i, 0, 0))).image.name
+             for i in range(3)]
+    calls = []
+    original = blobs.blob_names
+
+    def failing_blob_names(image, variants):
+        calls.append(image)
+        if len(calls) == 3:
+            raise RuntimeError("сбой посреди пересчёта")
+        return original(image, variants)
+
+    monkeypatch.setattr(blobs, "blob_names", failing_blob_names)
+    with pytest.raises(RuntimeError):
+        blobs.recount_refs(batch_size=1)
+    assert [refcount(name) for name in names] == [1, 1, 1], (
+        "Убедитесь, что прерванный пересчёт не оставляет обнулённых"
+        " счётчиков, по которым сборщик мусора удалит нужные файлы."
+    )
+    monkeypatch.undo()
+    assert blobs.recount_refs(batch_size=1) == 3
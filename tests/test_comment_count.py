@@ -0,0 +1,73 @@
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post, author=mixer.sequence(
+            another_user, another_user, post.author
+        )
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что счётчик `comment_count` увеличивается при"
+        " добавлении комментария."
+    )
+
+    comments[0].delete()
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == post.comments.count() == 1, (
+        "Убедитесь, что счётчик `comment_count` уменьшается при удалении"
+        " комментария, в том числе каскадном."
+    )
+
+
+def test_recount_comments_command(mixer: Mixer, post_with_published_location):
+    from blog.models import Post
+
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.update(comment_count=42)
+    call_command("recount_comments", batch_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `recount_comments` исправляет счётчики"
+        " комментариев."
+    )
+
+
+def test_fixture_comments_are_counted(
+        tmp_path, mixer: Mixer, post_with_published_location
+):
+    from django.core import serializers
+
+    from blog.models import Comment, Post
+
+    post = post_with_published_location
+    comments = mixer.cycle(2).blend("blog.Comment", post=post)
+    post.comment_count = 0
+    fixture = tmp_path / "comments.json"
+    # Комментарии идут раньше поста, как бывает в дампах.
+    fixture.write_text(serializers.serialize("json", [*comments, post]))
+    Comment.objects.all().delete()
+    Post.objects.update(comment_count=0)
+
+    call_command("loaddata", str(fixture), verbosity=0)
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что комментарии из фикстуры учитываются в счётчике."
+    )
+
+    Post.objects.update(comment_count=0)
+    Comment.objects.first().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        "Убедитесь, что счётчик не уходит ниже нуля."
+    )
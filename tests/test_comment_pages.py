@@ -0,0 +1,53 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comments_are_loaded_in_batches(
+        user_client, mixer: Mixer, post_with_published_location
+):
+    from blog.constants import COMMENTS_PER_PAGE
+
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PER_PAGE + 5).blend(
+        "blog.Comment", post=post
+    )
+    expected = [comment.id for comment in comments]
+
+    response = user_client.get(f"/posts/{post.id}/")
+    shown = [comment.id for comment in response.context["comments"]]
+    assert shown == expected[:COMMENTS_PER_PAGE], (
+        "Убедитесь, что страница поста выводит только первую порцию"
+        " комментариев в порядке их создания."
+    )
+
+    more_url = re.search(
+        r'href="(/posts/\d+/comments/\?after=[^"]+)"',
+        response.content.decode(),
+    )
+    assert more_url, (
+        "Убедитесь, что на странице поста есть ссылка на следующую порцию"
+        " комментариев."
+    )
+    response = user_client.get(more_url.group(1))
+    assert response.status_code == HTTPStatus.OK
+    shown = [comment.id for comment in response.context["comments"]]
+    assert shown == expected[COMMENTS_PER_PAGE:], (
+        "Убедитесь, что следующая порция комментариев начинается после"
+        " курсора."
+    )
+    assert "js-more-comments" not in response.content.decode()
+
+
+def test_comments_of_hidden_post_are_not_served(
+        another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url, response):
+    return client.get(
+        url,
+        HTTP_IF_NONE_MATCH=response["ETag"],
+        HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+    )
+
+
+def test_post_detail_not_modified(
+        user_client, mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = user_client.get(url)
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), "Убедитесь, что страница поста отдаёт заголовки ETag и Last-Modified."
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.NOT_MODIFIED
+    ), "Убедитесь, что неизменившаяся страница поста отдаёт статус 304."
+
+    mixer.blend("blog.Comment", post=post)
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.OK
+    ), "Убедитесь, что новый комментарий меняет ETag страницы поста."
+
+
+@pytest.mark.parametrize("client_fixture", ["client", "user_client"])
+def test_feeds_not_modified(
+        request, client_fixture, mixer: Mixer, post_with_published_location
+):
+    client = request.getfixturevalue(client_fixture)
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    responses = {url: client.get(url) for url in urls}
+    for url, response in responses.items():
+        assert revalidate(client, url, response).status_code == (
+            HTTPStatus.NOT_MODIFIED
+        ), f"Убедитесь, что неизменившаяся лента `{url}` отдаёт статус 304."
+
+    post.title = "Новый заголовок"
+    post.save()
+    for url, response in responses.items():
+        assert revalidate(client, url, response).status_code == (
+            HTTPStatus.OK
+        ), f"Убедитесь, что изменение поста меняет ETag ленты `{url}`."
@@ -7,6 +7,7 @@ from bs4 import BeautifulSoup
 from bs4.element import SoupStrainer
 from django.db.models import Model
 from django.http import HttpResponse
+from django.test import override_settings
 from django.test.client import Client
 from mixer.main import Mixer
 
@@ -22,6 +23,17 @@ from conftest import (
 pytestmark = [pytest.mark.django_db]
 
 
+@pytest.fixture(autouse=True)
+def render_every_page():
+    """
+    Тесты читают контекст шаблона, а страница из кэша не рендерится,
+    поэтому кэш здесь отключён.
+    """
+    dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    with override_settings(CACHES={"default": dummy, "versions": dummy}):
+        yield
+
+
 class ContentTester(ABC):
     n_per_page = N_PER_PAGE
 
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+# ETag страницы, пост, комментарии; для авторизованных ещё сессия
+# и пользователь.
+ANONYMOUS_DETAIL_QUERIES = 3
+AUTHENTICATED_DETAIL_QUERIES = 5
+
+
+@pytest.mark.parametrize(
+    "client_fixture, budget",
+    [
+        ("unlogged_client", ANONYMOUS_DETAIL_QUERIES),
+        ("user_client", AUTHENTICATED_DETAIL_QUERIES),
+        ("another_user_client", AUTHENTICATED_DETAIL_QUERIES),
+    ],
+)
+def test_post_detail_query_budget(
+        request, client_fixture, budget, mixer: Mixer,
+        post_with_published_location
+):
+    client = request.getfixturevalue(client_fixture)
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == HTTPStatus.OK
+    assert len(queries) == budget, (
+        "Убедитесь, что страница поста выполняет не больше"
+        f" {budget} запросов к базе данных независимо от зрителя и числа"
+        f" комментариев, а выполнено {len(queries)}."
+    )
+
+
+def test_hidden_post_visible_only_to_author(
+        user_client, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    url = f"/posts/{post.id}/"
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит свой снятый с публикации пост."
+    )
+    assert another_user_client.get(url).status_code == (
+        HTTPStatus.NOT_FOUND
+    ), "Убедитесь, что снятый с публикации пост недоступен другим."
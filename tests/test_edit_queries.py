@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Сессия, пользователь и один запрос объекта; форме поста нужны ещё
+# списки категорий и местоположений.
+EDIT_QUERY_BUDGETS = {
+    "edit_post": 5,
+    "delete_post": 3,
+    "edit_comment": 3,
+    "delete_comment": 3,
+}
+
+
+def get_url(view_name, comment):
+    post_id = comment.post_id
+    return {
+        "edit_post": f"/posts/{post_id}/edit/",
+        "delete_post": f"/posts/{post_id}/delete/",
+        "edit_comment": f"/posts/{post_id}/edit_comment/{comment.id}/",
+        "delete_comment": f"/posts/{post_id}/delete_comment/{comment.id}/",
+    }[view_name]
+
+
+@pytest.mark.parametrize("view_name", EDIT_QUERY_BUDGETS)
+def test_edit_views_query_budget(view_name, mixer, user, user_client,
+                                 post_with_published_location):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(get_url(view_name, comment))
+    assert response.status_code == 200
+    budget = EDIT_QUERY_BUDGETS[view_name]
+    assert len(queries) == budget, (
+        f"Убедитесь, что страница `{view_name}` загружает редактируемый"
+        f" объект один раз: ожидалось {budget} запросов,"
+        f" выполнено {len(queries)}."
+    )
+
+
+def test_not_author_is_redirected(another_user_client, mixer,
+                                  post_with_published_location):
+    comment = mixer.blend("blog.Comment", post=post_with_published_location)
+    for view_name in EDIT_QUERY_BUDGETS:
+        response = another_user_client.get(get_url(view_name, comment))
+        assert response.status_code == 302, (
+            f"Убедитесь, что страница `{view_name}` недоступна не автору."
+        )
+        assert response.url == f"/posts/{comment.post_id}/"
+
+
+@pytest.mark.parametrize("view_name", ["edit_post", "edit_comment"])
+def test_edited_object_is_loaded_without_joins(
+        view_name, mixer, user, user_client, post_with_published_location
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    table = "blog_post" if view_name == "edit_post" else "blog_comment"
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get(get_url(view_name, comment))
+    loads = [
+        query["sql"] for query in queries.captured_queries
+        if f'FROM "{table}"' in query["sql"]
+    ]
+    assert loads and not any("JOIN" in sql for sql in loads), (
+        f"Убедитесь, что страница `{view_name}` не присоединяет связанные"
+        " таблицы, которые ей не нужны."
+    )
@@ -0,0 +1,131 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+MODEL_ORDER = [
+    "auth.user", "blog.category", "blog.location", "blog.post",
+    "blog.comment",
+]
+
+
+def read_models(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as stream:
+        return [json.loads(line)["model"] for line in stream]
+
+
+def read_changed_models(path):
+    """Модели выгрузки без пользователей: они выгружаются всегда."""
+    return [model for model in read_models(path) if model != "auth.user"]
+
+
+@pytest.fixture
+def exported_comment(mixer: Mixer, post_with_published_location):
+    return mixer.blend("blog.Comment", post=post_with_published_location)
+
+
+def age_everything(moment):
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Category, Comment, Location, Post
+
+    get_user_model().objects.update(date_joined=moment, last_login=None)
+    for model in (Category, Location, Post):
+        model.objects.update(updated_at=moment)
+    Comment.objects.update(created_at=moment)
+
+
+def test_export_writes_ndjson_in_dependency_order(
+        tmp_path, exported_comment
+):
+    output = tmp_path / "dump.ndjson.gz"
+    call_command("export_ndjson", str(output))
+    models = read_models(output)
+    assert models == sorted(models, key=MODEL_ORDER.index), (
+        "Убедитесь, что родители выгружаются раньше детей."
+    )
+    assert models.count("blog.post") == 1
+    assert models.count("blog.comment") == 1
+
+
+def test_export_since_watermark(tmp_path, exported_comment):
+    from django.contrib.auth import get_user_model
+
+    long_ago = timezone.now() - timedelta(days=2)
+    age_everything(long_ago)
+    watermark = tmp_path / "watermark"
+    watermark.write_text((long_ago + timedelta(days=1)).isoformat())
+    output = tmp_path / "dump.ndjson"
+
+    call_command("export_ndjson", str(output), watermark_file=watermark)
+    assert read_changed_models(output) == [], (
+        "Убедитесь, что выгружаются только изменённые строки."
+    )
+    users = get_user_model().objects.count()
+    assert read_models(output).count("auth.user") == users, (
+        "Убедитесь, что пользователи выгружаются всегда: правку профиля"
+        " не отличить по дате."
+    )
+
+    exported_comment.text = "Исправленный комментарий"
+    exported_comment.save()
+    call_command(
+        "export_ndjson", str(output),
+        since=(long_ago + timedelta(days=1)).isoformat(),
+    )
+    assert read_changed_models(output) == ["blog.post", "blog.comment"], (
+        "Убедитесь, что правка комментария попадает в выгрузку."
+    )
+
+    call_command("export_ndjson", str(output), watermark_file=watermark)
+    assert read_changed_models(output) == ["blog.post", "blog.comment"]
+    call_command("export_ndjson", str(output), watermark_file=watermark)
+    assert read_changed_models(output) == [], (
+        "Убедитесь, что отметка выгрузки обновляется."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_round_trips_through_import(tmp_path, exported_comment):
+    from blog.models import Comment
+
+    output = tmp_path / "dump.ndjson"
+    call_command("export_ndjson", str(output))
+    Comment.objects.all().delete()
+    call_command("import_dump", str(output))
+    assert Comment.objects.get().text == exported_comment.text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_since_replicates_deletions(tmp_path, exported_comment):
+    from blog.models import Comment
+
+    since = timezone.now()
+    full = tmp_path / "full.ndjson"
+    call_command("export_ndjson", str(full))
+    comment_id = exported_comment.pk
+    exported_comment.delete()
+
+    delta = tmp_path / "delta.ndjson"
+    call_command("export_ndjson", str(delta), since=since.isoformat())
+    with open(delta, encoding="utf-8") as stream:
+        records = [json.loads(line) for line in stream]
+    assert {
+        "model": "blog.comment", "pk": comment_id, "deleted": True
+    } in records, (
+        "Убедитесь, что инкрементальная выгрузка отмечает удаления."
+    )
+
+    call_command("import_dump", str(full))
+    assert Comment.objects.filter(pk=comment_id).exists()
+    call_command("import_dump", str(delta))
+    assert not Comment.objects.filter(pk=comment_id).exists(), (
+        "Убедитесь, что загрузка выгрузки удаляет отмеченные объекты."
+    )
@@ -0,0 +1,96 @@
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_entry(post):
+    from blog.models import FeedEntry
+
+    return FeedEntry.objects.filter(post=post).first()
+
+
+def test_feed_follows_post_changes(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    entry = get_entry(post)
+    assert entry is not None, (
+        "Убедитесь, что опубликованный пост попадает в ленту."
+    )
+    assert (entry.title, entry.author_username, entry.category_slug) == (
+        post.title, post.author.username, post.category.slug
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    post.location.name = "Новое место"
+    post.location.save()
+    post.author.username = "renamed_author"
+    post.author.save()
+    entry = get_entry(post)
+    assert entry.comment_count == 1, (
+        "Убедитесь, что счётчик комментариев в ленте обновляется."
+    )
+    assert entry.location_name == "Новое место", (
+        "Убедитесь, что название места в ленте обновляется."
+    )
+    assert entry.author_username == "renamed_author", (
+        "Убедитесь, что имя автора в ленте обновляется."
+    )
+
+    post.category.is_published = False
+    post.category.save()
+    assert get_entry(post) is None, (
+        "Убедитесь, что посты снятой с публикации категории убираются из"
+        " ленты."
+    )
+    post.category.is_published = True
+    post.category.save()
+    assert get_entry(post) is not None, (
+        "Убедитесь, что посты снова опубликованной категории возвращаются"
+        " в ленту."
+    )
+
+    post.is_published = False
+    post.save()
+    assert get_entry(post) is None, (
+        "Убедитесь, что снятый с публикации пост убирается из ленты."
+    )
+
+
+def test_cached_card_follows_changes(
+        client, mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    content = client.get("/").content.decode("utf-8")
+    assert "Комментарии (0)" in content
+
+    mixer.blend("blog.Comment", post=post)
+    post.author.username = "card_author"
+    post.author.save()
+    content = client.get("/").content.decode("utf-8")
+    assert "Комментарии (1)" in content and "@card_author" in content, (
+        "Убедитесь, что закэшированная карточка поста обновляется при"
+        " изменении отображаемых в ней данных."
+    )
+
+
+def test_category_edit_updates_feed_without_rebuild(
+        monkeypatch, post_with_published_location
+):
+    from blog.managers import FeedEntryManager
+
+    def refresh_where(self, *args, **kwargs):
+        raise AssertionError("лента перестраивается целиком")
+
+    monkeypatch.setattr(FeedEntryManager, "refresh_where", refresh_where)
+    category = post_with_published_location.category
+    category.description = "Новое описание"
+    category.save()
+    category.title = "Новый заголовок"
+    category.slug = "new-slug"
+    category.save()
+    entry = get_entry(post_with_published_location)
+    assert (entry.category_title, entry.category_slug) == (
+        "Новый заголовок", "new-slug"
+    ), "Убедитесь, что смена заголовка и slug категории попадает в ленту."
@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_body_is_shared_and_header_is_personal(
+        client, user_client, user, post_with_published_location
+):
+    from blog.cache import page_cache_stats
+
+    anonymous = client.get("/").content.decode()
+    personal = user_client.get("/").content.decode()
+    assert page_cache_stats() == {"hits": 1, "misses": 1}, (
+        "Убедитесь, что тело ленты кэшируется одно на всех пользователей."
+    )
+    header_link = f">{user.username}</a>"
+    assert "Войти" in anonymous and header_link not in anonymous
+    assert "Выйти" in personal and header_link in personal, (
+        "Убедитесь, что шапка страницы заполняется для каждого"
+        " пользователя."
+    )
+    assert "<!--fragment:" not in anonymous + personal
+
+
+def test_post_detail_fragments(
+        client, user_client, another_user_client, mixer,
+        post_with_published_location
+):
+    from blog.cache import page_cache_stats
+
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=post.author)
+    url = f"/posts/{post.id}/"
+    author = user_client.get(url).content.decode()
+    another = another_user_client.get(url).content.decode()
+    anonymous = client.get(url).content.decode()
+    assert page_cache_stats() == {"hits": 2, "misses": 1}
+
+    edit_post = f"/posts/{post.id}/edit/"
+    edit_comment = f"/posts/{post.id}/edit_comment/{comment.id}/"
+    assert edit_post in author and edit_comment in author
+    assert edit_post not in another and edit_comment not in another, (
+        "Убедитесь, что ссылки автора не попадают в общий кэш."
+    )
+    assert "csrfmiddlewaretoken" in author
+    assert "csrfmiddlewaretoken" in another
+    assert "csrfmiddlewaretoken" not in anonymous
+    assert f"/posts/{post.id}/comment/" not in anonymous
+
+
+def test_hidden_post_is_not_shared(user_client, post_with_published_location):
+    from blog.cache import page_cache_stats
+
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    user_client.get(f"/posts/{post.id}/")
+    user_client.get(f"/posts/{post.id}/")
+    assert page_cache_stats() == {"hits": 0, "misses": 0}, (
+        "Убедитесь, что страница, видимая только автору, не кэшируется."
+    )
+
+
+def test_fragment_endpoint(user_client, user, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.get("/fragments/header/")
+    assert response.status_code == HTTPStatus.OK
+    assert user.username in response.content.decode()
+    assert "no-cache" in response["Cache-Control"]
+
+    response = user_client.get(
+        "/fragments/post_actions/", {"post": post.id, "author": user.id}
+    )
+    assert f"/posts/{post.id}/delete/" in response.content.decode()
+
+    assert user_client.get("/fragments/missing/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert user_client.get(
+        "/fragments/post_actions/", {"post": post.id}
+    ).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_esi_mode(client, settings, post_with_published_location):
+    settings.BLOG_FRAGMENTS_ESI = True
+    post = post_with_published_location
+    response = client.get(f"/posts/{post.id}/")
+    content = response.content.decode()
+    assert '<esi:include src="/fragments/header/"/>' in content
+    assert (
+        f'<esi:include src="/fragments/comment_form/?post={post.id}"/>'
+        in content
+    )
+    assert response["Surrogate-Control"] == 'content="ESI/1.0"'
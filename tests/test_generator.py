@@ -0,0 +1,68 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+COUNTS = {
+    "users": 6, "categories": 3, "locations": 4, "posts": 40, "comments": 120,
+}
+
+
+def snapshot():
+    from blog.models import Comment, Post
+
+    return (
+        list(Post.objects.order_by("pk").values_list(
+            "title", "author__username", "is_published"
+        )),
+        list(Comment.objects.order_by("pk").values_list(
+            "text", "post__title"
+        )),
+    )
+
+
+def test_generate_fills_counters_and_feed():
+    from django.db.models import Count, F
+    from django.utils import timezone
+
+    from blog.generator import generate
+    from blog.models import FeedEntry, Post
+
+    generate(COUNTS, seed=1, chunk_size=7)
+    assert Post.objects.count() == COUNTS["posts"]
+    assert not Post.objects.annotate(actual=Count("comments")).exclude(
+        comment_count=F("actual")
+    ).exists(), "Убедитесь, что счётчики комментариев пересчитаны."
+    assert Post.objects.filter(is_published=False).exists()
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists()
+    assert FeedEntry.objects.count() == Post.objects.filter(
+        is_published=True, category__is_published=True
+    ).count()
+
+
+def test_generate_is_deterministic():
+    from django.contrib.auth import get_user_model
+
+    from blog.generator import generate
+    from blog.models import Category, Comment, Location, Post
+
+    generate(COUNTS, seed=7, chunk_size=7)
+    first = snapshot()
+    for model in (Comment, Post, Category, Location, get_user_model()):
+        model.objects.all().delete()
+    generate(COUNTS, seed=7, chunk_size=7)
+    assert snapshot() == first, (
+        "Убедитесь, что одинаковое зерно даёт одинаковые данные."
+    )
+
+
+def test_generate_twice_with_same_seed_appends():
+    from django.contrib.auth import get_user_model
+
+    from blog.generator import generate
+
+    generate(COUNTS, seed=3, chunk_size=7)
+    generate(COUNTS, seed=3, chunk_size=7)
+    assert get_user_model().objects.count() == 2 * COUNTS["users"], (
+        "Убедитесь, что повторный запуск с тем же зерном добавляет"
+        " пользователей с уникальными именами."
+    )
@@ -0,0 +1,109 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post_with_large_image(
+        mixer: Mixer, user, published_location, published_category
+):
+    from blog.jobs import run_pending
+
+    buffer = BytesIO()
+    Image.new("RGB", (3000, 1500), color=(73, 109, 137)).save(buffer, "JPEG")
+    post = mixer.blend(
+        "blog.Post",
+        is_published=True,
+        location=published_location,
+        category=published_category,
+        author=user,
+        image=ImageFile(buffer, name="large_image.jpg"),
+    )
+    run_pending()
+    post.refresh_from_db()
+    return post
+
+
+def test_variants_are_generated_on_upload(post_with_large_image):
+    variants = post_with_large_image.image_variants
+    assert {
+        kind: (variant["width"], variant["height"])
+        for kind, variant in variants.items()
+    } == {
+        "card": (640, 320), "detail": (1280, 640), "full": (2560, 1280),
+    }
+    assert all(
+        variant["name"].endswith(".webp") for variant in variants.values()
+    )
+
+
+def test_small_image_variants_share_file(post_with_published_location):
+    from blog.jobs import run_pending
+
+    run_pending()
+    post_with_published_location.refresh_from_db()
+    variants = post_with_published_location.image_variants
+    assert len({variant["name"] for variant in variants.values()}) == 1, (
+        "Убедитесь, что копии не увеличивают изображение."
+    )
+
+
+def test_cards_use_card_variant(client, post_with_large_image):
+    card = post_with_large_image.variants["card"]
+    for url in ("/", f"/posts/{post_with_large_image.id}/"):
+        content = client.get(url).content.decode()
+        assert 'srcset="' in content
+        assert post_with_large_image.image.url not in content, (
+            "Убедитесь, что в карточках не выводится исходное фото."
+        )
+    content = client.get("/").content.decode()
+    assert f'src="{card["url"]}"' in content
+    assert 'width="640" height="320"' in content
+
+
+def test_placeholder_until_variants_are_ready(
+        client, post_with_published_location
+):
+    from blog.jobs import run_pending
+    from blog.models import Job
+
+    post = post_with_published_location
+    assert post.image_variants == {}
+    assert Job.objects.filter(status=Job.PENDING).count() == 1, (
+        "Убедитесь, что обработка фото ставится в очередь."
+    )
+    content = client.get("/").content.decode()
+    assert "image-placeholder." in content
+    assert post.image.url not in content
+
+    assert run_pending() == 1
+    content = client.get("/").content.decode()
+    assert "image-placeholder." not in content, (
+        "Убедитесь, что после обработки показывается уменьшенная копия."
+    )
+
+
+def test_backfill_command(post_with_large_image):
+    from blog.jobs import run_pending
+    from blog.models import FeedEntry, Post
+
+    Post.objects.update(image_variants={})
+    FeedEntry.objects.refresh_posts([post_with_large_image.pk])
+    call_command("generate_image_variants")
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    assert post.image_variants["card"]["width"] == 640
+    assert FeedEntry.objects.get(pk=post.pk).image_variants == (
+        post.image_variants
+    )
+
+    Post.objects.update(image_variants={})
+    call_command("generate_image_variants", enqueue=True)
+    assert Post.objects.get(pk=post.pk).image_variants == {}
+    assert run_pending() == 1
+    assert Post.objects.get(pk=post.pk).image_variants
@@ -0,0 +1,121 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+DUMP = Path(__file__).resolve().parent.parent / "blogicum" / "db.json"
+
+
+def test_json_array_is_read_incrementally():
+    from blog.importer import iter_json_array
+
+    text = DUMP.read_text(encoding="utf-8")
+    assert list(iter_json_array(io.StringIO(text), read_size=50)) == (
+        json.loads(text)
+    )
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"model": "blog.post"}')))
+
+
+@pytest.fixture
+def blog_dump(tmp_path):
+    """db.json без записей, завязанных на id типов содержимого."""
+    dump = tmp_path / "blog.json"
+    dump.write_text(json.dumps([
+        obj for obj in json.loads(DUMP.read_text(encoding="utf-8"))
+        if obj["model"].startswith(("blog.", "auth.user"))
+    ]), encoding="utf-8")
+    return str(dump)
+
+
+def test_import_dump_loads_blog_objects(blog_dump, capsys):
+    from django.db import connection
+
+    from blog.models import FeedEntry, Post
+
+    call_command("import_dump", blog_dump, batch_size=7)
+    assert "Загружено объектов: 61" in capsys.readouterr().out
+    assert Post.objects.count() == 39
+    post = Post.objects.get(pk=1)
+    assert post.created_at.year == 2022, (
+        "Убедитесь, что импорт сохраняет даты создания из дампа."
+    )
+    assert post.updated_at == post.created_at
+    assert FeedEntry.objects.count() == Post.postobj.get_pub().count()
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, Post._meta.db_table
+        )
+    assert "post_published_pub_date_idx" in constraints, (
+        "Убедитесь, что отложенные индексы создаются после загрузки."
+    )
+
+    call_command("import_dump", blog_dump)
+    assert Post.objects.count() == 39
+
+
+def test_import_ndjson(tmp_path):
+    from blog.models import Category
+
+    dump = tmp_path / "categories.ndjson"
+    dump.write_text("\n".join(
+        json.dumps({
+            "model": "blog.category",
+            "pk": number,
+            "fields": {
+                "title": f"Категория {number}",
+                "description": "Описание",
+                "slug": f"category-{number}",
+                "is_published": True,
+                "created_at": "2022-12-18T23:03:52.159Z",
+            },
+        })
+        for number in range(1, 6)
+    ) + "\n\n", encoding="utf-8")
+    call_command("import_dump", str(dump), batch_size=2)
+    assert Category.objects.count() == 5
+
+
+def test_deferred_indexes_are_restored():
+    from django.db import connection
+
+    from blog.bulk import deferred_indexes
+    from blog.models import Post
+
+    def index_names():
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        return {
+            name for name, info in constraints.items()
+            if info["index"] and not info["unique"]
+        }
+
+    before = index_names()
+    assert before
+    with deferred_indexes([Post]):
+        assert index_names() == set(), (
+            "Убедитесь, что неуникальные индексы удаляются на время загрузки."
+        )
+    assert index_names() == before, (
+        "Убедитесь, что после загрузки индексы создаются с прежними именами."
+    )
+
+
+def test_loaddata_loads_fixture():
+    from blog.models import Category, Post
+
+    # Права и журнал админки ссылаются на id типов содержимого,
+    # а в тестовой базе они пересоздаются с другими id.
+    call_command(
+        "loaddata", str(DUMP), verbosity=0,
+        exclude=["auth.permission", "admin.logentry"],
+    )
+    assert (Category.objects.count(), Post.objects.count()) == (6, 39), (
+        "Убедитесь, что фикстура db.json загружается командой loaddata."
+    )
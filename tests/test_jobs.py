@@ -0,0 +1,159 @@
+import time
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def flaky_handler():
+    from blog.jobs import handlers
+
+    calls = []
+
+    def handler(fail):
+        calls.append(fail)
+        if fail:
+            raise RuntimeError("сбой задачи")
+
+    handlers["test_job"] = handler
+    yield calls
+    del handlers["test_job"]
+
+
+def test_job_is_claimed_once(flaky_handler):
+    from blog.models import Job
+
+    job = Job.objects.enqueue("test_job", fail=False)
+    assert Job.objects.claim(5) == [job.pk]
+    assert Job.objects.claim(5) == [], (
+        "Убедитесь, что задачу не может взять второй воркер."
+    )
+
+
+def test_failed_job_is_retried_then_marked_failed(flaky_handler):
+    from blog.constants import JOB_MAX_ATTEMPTS
+    from blog.jobs import execute_job, run_pending
+    from blog.models import Job
+
+    job = Job.objects.enqueue("test_job", fail=True)
+    for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        assert Job.objects.claim(1) == [job.pk]
+        assert execute_job(job.pk) is False
+        job.refresh_from_db()
+        assert job.attempts == attempt
+    assert job.status == Job.FAILED
+    assert "сбой задачи" in job.last_error
+
+    ok = Job.objects.enqueue("test_job", fail=False)
+    assert run_pending() == 1
+    ok.refresh_from_db()
+    assert ok.status == Job.DONE
+
+
+def test_abandoned_jobs_are_requeued_until_attempts_run_out(flaky_handler):
+    from datetime import timedelta
+
+    from django.utils.timezone import now
+
+    from blog.constants import JOB_HEARTBEAT_TIMEOUT, JOB_MAX_ATTEMPTS
+    from blog.models import Job
+
+    retried = Job.objects.enqueue("test_job", fail=False)
+    exhausted = Job.objects.enqueue("test_job", fail=False)
+    alive = Job.objects.enqueue("test_job", fail=False)
+    Job.objects.claim(3)
+    silent = now() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT + 1)
+    Job.objects.filter(pk__in=[retried.pk, exhausted.pk]).update(
+        heartbeat_at=silent
+    )
+    Job.objects.filter(pk=exhausted.pk).update(attempts=JOB_MAX_ATTEMPTS)
+    Job.objects.beat([alive.pk])
+
+    assert Job.objects.requeue_stale(
+        JOB_HEARTBEAT_TIMEOUT, JOB_MAX_ATTEMPTS
+    ) == 1
+    statuses = dict(Job.objects.values_list("pk", "status"))
+    assert statuses[retried.pk] == Job.PENDING
+    assert statuses[exhausted.pk] == Job.FAILED, (
+        "Убедитесь, что брошенная задача, исчерпавшая попытки, "
+        "не возвращается в очередь."
+    )
+    assert statuses[alive.pk] == Job.RUNNING, (
+        "Убедитесь, что задача с недавним пульсом не считается брошенной."
+    )
+
+
+def test_stale_image_job_does_nothing(post_with_published_location):
+    from blog.jobs import process_post_image
+    from blog.models import Post
+
+    post = post_with_published_location
+    process_post_image(post.pk, "blog_images/replaced.jpg")
+    assert Post.objects.get(pk=post.pk).image_variants == {}
+
+
+def test_failed_enqueue_rolls_back_new_image(
+        monkeypatch, post_with_published_location
+):
+    from io import BytesIO
+
+    from django.core.files.images import ImageFile
+    from PIL import Image
+
+    from blog.jobs import run_pending
+    from blog.managers import JobManager
+    from blog.models import Post
+
+    run_pending()
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    saved = (post.image.name, post.image_variants)
+
+    def enqueue(self, kind, **payload):
+        raise RuntimeError("очередь недоступна")
+
+    monkeypatch.setattr(JobManager, "enqueue", enqueue)
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10)).save(buffer, "JPEG")
+    post.image = ImageFile(buffer, name="new_image.jpg")
+    with pytest.raises(RuntimeError):
+        post.save()
+    post = Post.objects.get(pk=post.pk)
+    assert (post.image.name, post.image_variants) == saved, (
+        "Убедитесь, что пост и задача обработки фото сохраняются "
+        "в одной транзакции."
+    )
+
+
+def test_worker_is_woken_after_commit(
+        monkeypatch, django_capture_on_commit_callbacks
+):
+    from blog.jobs import worker
+    from blog.models import Job
+
+    woken = []
+    monkeypatch.setattr(worker, "wake", lambda: woken.append(True))
+    with django_capture_on_commit_callbacks(execute=True):
+        Job.objects.enqueue("test_job", fail=False)
+        assert not woken, (
+            "Убедитесь, что воркер будится только после коммита задачи."
+        )
+    assert woken
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_thread_processes_jobs(post_with_published_location):
+    from blog.jobs import JobWorker
+    from blog.models import Job
+
+    worker = JobWorker(workers=1, max_sleep=0.05)
+    worker.start()
+    try:
+        for _ in range(100):
+            if not Job.objects.exclude(status=Job.DONE).exists():
+                break
+            time.sleep(0.05)
+    finally:
+        worker.stop()
+    assert not Job.objects.exclude(status=Job.DONE).exists()
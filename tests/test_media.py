@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+DIGEST = "ab" * 32
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    directory = tmp_path / "blog_images" / "ab" / "ab"
+    directory.mkdir(parents=True)
+    (directory / f"{DIGEST}.png").write_bytes(CONTENT)
+    (tmp_path / "legacy.png").write_bytes(CONTENT)
+    return f"/media/blog_images/ab/ab/{DIGEST}.png"
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_media_is_served_with_cache_validators(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == HTTPStatus.OK
+    assert read(response) == CONTENT
+    assert response["Content-Type"] == "image/png"
+    assert response["ETag"] == f'"{DIGEST}"'
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с хэшем в имени кэшируются навсегда."
+    )
+    assert "Last-Modified" in response
+
+    response = client.get(media_file, HTTP_IF_NONE_MATCH=f'"{DIGEST}"')
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    legacy = client.get("/media/legacy.png")
+    assert legacy.status_code == HTTPStatus.OK
+    assert "immutable" not in legacy["Cache-Control"]
+
+
+def test_range_requests(client, media_file):
+    response = client.get(media_file, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert read(response) == CONTENT[10:20]
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response["Content-Length"] == "10"
+
+    response = client.get(media_file, HTTP_RANGE="bytes=-5")
+    assert read(response) == CONTENT[-5:]
+
+    response = client.get(media_file, HTTP_RANGE="bytes=5000-")
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    response = client.get(
+        media_file, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что при устаревшем If-Range отдаётся весь файл."
+    )
+    assert read(response) == CONTENT
+
+
+@pytest.mark.parametrize(
+    "accel, header, expected",
+    (
+        ("x-accel-redirect", "X-Accel-Redirect",
+         f"/internal-media/blog_images/ab/ab/{DIGEST}.png"),
+        ("x-sendfile", "X-Sendfile", None),
+    ),
+)
+def test_front_server_handoff(
+        client, media_file, settings, accel, header, expected
+):
+    settings.BLOG_MEDIA_ACCEL = accel
+    response = client.get(media_file)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b""
+    location = response[header]
+    if expected:
+        assert location == expected
+    else:
+        assert location == str(settings.MEDIA_ROOT / media_file[7:])
+    assert "immutable" in response["Cache-Control"]
+
+
+def test_missing_and_outside_files_are_not_found(client, media_file):
+    assert client.get("/media/missing.png").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get("/media/../manage.py").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get("/media/blog_images/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
@@ -0,0 +1,70 @@
+import os
+import re
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_response_has_server_timing(client, post_with_published_location):
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    timing = response.get("Server-Timing", "")
+    for metric in ("app;dur=", "db;dur=", "tpl;dur=", "cache;desc="):
+        assert metric in timing, (
+            "Убедитесь, что ответ содержит заголовок Server-Timing"
+            " с временем запроса, базы данных, шаблонов и кэша."
+        )
+    queries = int(re.search(r'desc="(\d+) queries"', timing).group(1))
+    assert queries > 0
+
+
+def test_metrics_endpoint_aggregates_by_view(
+        client, post_with_published_location
+):
+    client.get("/")
+    client.get("/")
+    response = client.get("/metrics/")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    text = response.content.decode()
+    pid = os.getpid()
+    match = re.search(
+        r'^blog_request_duration_seconds_count'
+        rf'\{{view="blog:index",pid="{pid}"\}} (\d+)$',
+        text, re.MULTILINE,
+    )
+    assert match and int(match.group(1)) >= 2, (
+        "Убедитесь, что показатели накапливаются по именам URL."
+    )
+    assert (
+        f'blog_cache_hits_total{{view="blog:index",pid="{pid}"}}' in text
+    ), "Убедитесь, что показатели помечены процессом, который их собрал."
+    assert '# TYPE blog_db_queries histogram' in text
+
+
+def test_metrics_endpoint_is_internal(client):
+    response = client.get("/metrics/", REMOTE_ADDR="10.0.0.1")
+    assert response.status_code == 404
+
+
+def test_instrumentation_is_scoped_to_request(
+        client, post_with_published_location
+):
+    from django.core.cache import caches
+
+    client.get("/")
+    timing = client.get("/")["Server-Timing"]
+    hits = int(re.search(r'hit=(\d+)', timing).group(1))
+    assert hits > 0, "Убедитесь, что учитываются попадания в кэш."
+    backend = caches["default"]
+    assert "get" not in vars(backend), (
+        "Убедитесь, что обёртки кэша снимаются после запроса."
+    )
+    assert not hasattr(type(backend).get, "__wrapped__"), (
+        "Убедитесь, что классы бэкендов кэша не подменяются."
+    )
+
+    timing = client.get(f"/posts/{post_with_published_location.id}/")[
+        "Server-Timing"
+    ]
+    assert float(re.search(r'tpl;dur=([\d.]+)', timing).group(1)) > 0
@@ -0,0 +1,46 @@
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_detector_raises_on_repeated_queries(
+        user, user_client, mixer: Mixer, published_category,
+        published_location, monkeypatch
+):
+    from blog.managers import PostQuerySet
+    from blog.queries import NPlusOneError
+
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+    )
+    url = f"/profile/{user.username}/"
+    user_client.get(url)
+
+    monkeypatch.setattr(
+        PostQuerySet, "with_related_data", lambda queryset: queryset
+    )
+    with pytest.raises(NPlusOneError):
+        user_client.get(url)
+
+
+def test_detector_logs_in_log_mode(
+        user, user_client, mixer: Mixer, published_category,
+        published_location, monkeypatch, settings, caplog
+):
+    from blog.managers import PostQuerySet
+
+    settings.BLOG_NPLUSONE_MODE = "log"
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+    )
+    monkeypatch.setattr(
+        PostQuerySet, "with_related_data", lambda queryset: queryset
+    )
+    response = user_client.get(f"/profile/{user.username}/")
+    assert response.status_code == 200
+    assert any(
+        record.name == "blog.nplusone" for record in caplog.records
+    ), "Убедитесь, что в режиме 'log' N+1 записывается в лог."
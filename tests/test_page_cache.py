@@ -0,0 +1,158 @@
+import pytest
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_feed_pages_are_cached(
+        client, user_client, mixer: Mixer, post_with_published_location
+):
+    from blog.cache import page_cache_stats
+
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for url in urls:
+        client.get(url)
+        client.get(url)
+    assert page_cache_stats() == {"hits": 3, "misses": 3}, (
+        "Убедитесь, что страницы лент кэшируются для анонимных"
+        " пользователей."
+    )
+    user_client.get("/")
+    assert page_cache_stats() == {"hits": 4, "misses": 3}, (
+        "Убедитесь, что тело ленты кэшируется одно на всех пользователей."
+    )
+    user_client.get(f"/profile/{post.author.username}/")
+    assert page_cache_stats() == {"hits": 4, "misses": 3}, (
+        "Убедитесь, что профиль для авторизованных пользователей не"
+        " кэшируется."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    for url in urls:
+        assert "Комментарии (1)" in client.get(url).content.decode(), (
+            "Убедитесь, что кэш страниц сбрасывается при новом комментарии."
+        )
+
+    post.location.name = "Переименованное место"
+    post.location.save()
+    for url in urls:
+        assert "Переименованное место" in client.get(url).content.decode(), (
+            "Убедитесь, что кэш страниц сбрасывается при изменении места."
+        )
+
+
+def test_unrelated_feeds_stay_cached(
+        client, mixer: Mixer, post_with_published_location,
+        post_with_another_category
+):
+    from blog.cache import page_cache_stats
+
+    post = post_with_published_location
+    url = f"/category/{post_with_another_category.category.slug}/"
+    client.get(url)
+    mixer.blend("blog.Comment", post=post)
+    client.get(url)
+    assert page_cache_stats()["hits"] == 1, (
+        "Убедитесь, что изменения в одной категории не сбрасывают кэш"
+        " страниц других категорий."
+    )
+
+
+def test_post_page_shows_renamed_commenter(
+        client, mixer: Mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    url = f"/posts/{post.id}/"
+    etag = client.get(url)["ETag"]
+    another_user.username = "renamed_commenter"
+    another_user.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "@renamed_commenter" in response.content.decode(), (
+        "Убедитесь, что страница поста сбрасывается при смене имени"
+        " комментатора."
+    )
+
+
+def test_category_change_keeps_other_pages_cached(
+        client, post_with_published_location, post_with_another_category
+):
+    from blog.cache import invalidate_all_pages, page_cache_stats
+
+    post = post_with_published_location
+    urls = (
+        f"/category/{post_with_another_category.category.slug}/",
+        f"/posts/{post_with_another_category.id}/",
+    )
+    for url in urls:
+        client.get(url)
+    post.category.title = "Переименованная категория"
+    post.category.save()
+    for url in urls:
+        client.get(url)
+    assert page_cache_stats() == {"hits": 2, "misses": 2}, (
+        "Убедитесь, что изменение категории сбрасывает только страницы"
+        " с её постами."
+    )
+
+    invalidate_all_pages()
+    for url in urls:
+        client.get(url)
+    assert page_cache_stats() == {"hits": 2, "misses": 4}, (
+        "Убедитесь, что после массовой загрузки сбрасываются все страницы."
+    )
+
+
+def test_pages_are_reset_again_after_commit(
+        mixer: Mixer, django_capture_on_commit_callbacks,
+        post_with_published_location
+):
+    from blog.cache import INDEX_FEED, page_tag, page_tag_version
+
+    tag = page_tag(INDEX_FEED)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        mixer.blend("blog.Comment", post=post_with_published_location)
+        # Версия, под которую конкурентный запрос мог закэшировать
+        # страницу со старыми строками до коммита.
+        version = page_tag_version(tag)
+    assert callbacks
+    assert page_tag_version(tag) != version, (
+        "Убедитесь, что кэш страниц сбрасывается и после коммита."
+    )
+
+
+def test_unknown_query_parameters_bypass_page_cache(
+        client, post_with_published_location
+):
+    from blog.cache import page_cache_stats
+
+    client.get("/?x=1")
+    client.get("/?x=2")
+    assert page_cache_stats() == {"hits": 0, "misses": 0}, (
+        "Убедитесь, что произвольные параметры запроса не создают"
+        " записей в кэше страниц."
+    )
+    client.get("/?page=1")
+    client.get("/?page=1")
+    assert page_cache_stats() == {"hits": 1, "misses": 1}
+
+
+def test_page_versions_survive_page_cache_culling(
+        post_with_published_location
+):
+    from django.core.cache import cache
+
+    from blog.cache import INDEX_FEED, page_tag, page_tag_version
+
+    version = page_tag_version(page_tag(INDEX_FEED))
+    cache.clear()
+    assert page_tag_version(page_tag(INDEX_FEED)) == version, (
+        "Убедитесь, что версии меток хранятся вне вытесняемого кэша"
+        " страниц."
+    )
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category):
+    same_date = timezone.now() - timedelta(days=1)
+    pub_dates = (
+        same_date if i % 3 == 0 else same_date - timedelta(hours=i)
+        for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_dates,
+    )
+
+
+def test_cursor_pages_cover_feed(client, feed_posts):
+    from blog.models import FeedEntry
+
+    expected = list(
+        FeedEntry.objects.get_for_index().values_list("pk", flat=True)
+    )
+    response = client.get("/")
+    page_obj = response.context["page_obj"]
+    pages = [[post.pk for post in page_obj]]
+    seen = list(pages[0])
+    while page_obj.has_next():
+        response = client.get(f"/?after={page_obj.next_cursor}")
+        page_obj = response.context["page_obj"]
+        assert page_obj.is_cursor, (
+            "Убедитесь, что параметр `after` включает пагинацию по курсору."
+        )
+        pages.append([post.pk for post in page_obj])
+        seen.extend(pages[-1])
+    assert seen == expected, (
+        "Убедитесь, что пагинация по курсору проходит ленту без пропусков"
+        " и повторов, в том числе для постов с одинаковой датой публикации."
+    )
+
+    pages.pop()
+    while page_obj.has_previous() and pages:
+        response = client.get(f"/?before={page_obj.previous_cursor}")
+        page_obj = response.context["page_obj"]
+        assert [post.pk for post in page_obj] == pages.pop(), (
+            "Убедитесь, что параметр `before` возвращает предыдущую страницу."
+        )
+
+
+def test_invalid_cursor_falls_back_to_first_page(client, feed_posts):
+    response = client.get("/?after=not-a-cursor")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_feed_count_is_cached_and_invalidated(
+        client, mixer: Mixer, feed_posts, published_category
+):
+    client.get("/")
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/?page=2")
+    assert not [q for q in queries if "COUNT(" in q["sql"]], (
+        "Убедитесь, что количество постов ленты не пересчитывается"
+        " на каждой странице."
+    )
+    assert response.context["page_obj"].paginator.count == len(feed_posts), (
+        "Убедитесь, что количество постов ленты берётся из кэша."
+    )
+
+    mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(minutes=1),
+    )
+    response = client.get("/?page=2")
+    assert response.context["page_obj"].paginator.count == (
+        len(feed_posts) + 1
+    ), "Убедитесь, что кэш количества постов сбрасывается при новом посте."
+
+    published_category.is_published = False
+    published_category.save()
+    response = client.get("/")
+    assert response.context["page_obj"].paginator.count == 0, (
+        "Убедитесь, что кэш количества постов сбрасывается при снятии"
+        " категории с публикации."
+    )
+
@@ -0,0 +1,86 @@
+from typing import List
+
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Проверяется план запросов SQLite.",
+    ),
+]
+
+
+def explain_query_plan(queryset: QuerySet) -> List[str]:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def feed_querysets(post):
+    from blog.models import FeedEntry, Post
+    from blog.utils import cursor_queryset
+
+    querysets = {
+        "FeedEntry.get_for_index": FeedEntry.objects.get_for_index(),
+        "FeedEntry.get_for_category": FeedEntry.objects.get_for_category(
+            post.category
+        ),
+        "FeedEntry.get_for_profile": FeedEntry.objects.get_for_profile(
+            post.author
+        ),
+        "get_for_index": Post.postobj.get_for_index(),
+        "get_for_category": Post.postobj.get_for_category(post.category),
+        "get_for_profile": Post.postobj.get_for_profile(post.author),
+        "get_for_profile_auth": Post.postobj.get_for_profile_auth(
+            post.author
+        ),
+    }
+    cursor = (post.pub_date, post.id)
+    pages = {}
+    for name, queryset in querysets.items():
+        pages[name] = queryset[:N_PER_PAGE]
+        pages[f"{name}:count"] = queryset.order_by()
+        pages[f"{name}:after"] = cursor_queryset(
+            queryset, after=cursor)[:N_PER_PAGE]
+        pages[f"{name}:before"] = cursor_queryset(
+            queryset, before=cursor)[:N_PER_PAGE]
+    return pages
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "get_for_index",
+        "get_for_category",
+        "get_for_profile",
+        "get_for_profile_auth",
+        "FeedEntry.get_for_index",
+        "FeedEntry.get_for_category",
+        "FeedEntry.get_for_profile",
+    ],
+)
+def test_feed_query_plans(method, post_with_published_location):
+    pages = feed_querysets(post_with_published_location)
+    for name in (method, f"{method}:count", f"{method}:after",
+                 f"{method}:before"):
+        plan = explain_query_plan(pages[name])
+        full_scans = [
+            step for step in plan
+            if step.startswith("SCAN")
+            and ("blog_post" in step or "blog_feedentry" in step)
+        ]
+        assert not full_scans, (
+            f"Убедитесь, что запрос `{name}` использует индекс"
+            f" таблицы постов, а не полный просмотр таблицы: {plan}"
+        )
+        temp_sorts = [step for step in plan if "TEMP B-TREE" in step]
+        assert not temp_sorts, (
+            f"Убедитесь, что запрос `{name}` получает посты в"
+            f" порядке индекса, без временной сортировки: {plan}"
+        )
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_scheduler_fires_for_posts_that_became_visible(
+        mixer: Mixer, user, published_category
+):
+    from blog.constants import SCHEDULER_LAST_FIRED_KEY
+    from blog.scheduler import PublicationScheduler, post_became_visible
+
+    current = timezone.now()
+    cache.set(SCHEDULER_LAST_FIRED_KEY, current - timedelta(minutes=5))
+    due_post, future_post, old_post = mixer.cycle(3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=mixer.sequence(
+            current - timedelta(minutes=1),
+            current + timedelta(hours=1),
+            current - timedelta(days=1),
+        ),
+    )
+    fired = []
+
+    def on_visible(sender, post, **kwargs):
+        fired.append(post.pk)
+
+    post_became_visible.connect(on_visible)
+    try:
+        scheduler = PublicationScheduler()
+        next_date = scheduler.run_pending()
+        assert fired == [due_post.pk], (
+            "Убедитесь, что планировщик отправляет событие только для постов,"
+            " ставших видимыми после прошлого запуска."
+        )
+        assert next_date == future_post.pub_date, (
+            "Убедитесь, что планировщик возвращает дату ближайшей отложенной"
+            " публикации."
+        )
+        assert 0 < scheduler.seconds_until(next_date) <= scheduler.max_sleep
+
+        scheduler.run_pending()
+        assert fired == [due_post.pk], (
+            "Убедитесь, что планировщик не отправляет событие повторно."
+        )
+    finally:
+        post_became_visible.disconnect(on_visible)
+
+
+def test_scheduler_replays_recent_posts_when_state_is_lost(
+        mixer: Mixer, user, published_category
+):
+    from blog.constants import SCHEDULER_LAST_FIRED_KEY
+    from blog.scheduler import PublicationScheduler, post_became_visible
+
+    cache.delete(SCHEDULER_LAST_FIRED_KEY)
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=timezone.now() - timedelta(minutes=1),
+    )
+    fired = []
+
+    def on_visible(sender, post, **kwargs):
+        fired.append(post.pk)
+
+    post_became_visible.connect(on_visible)
+    try:
+        PublicationScheduler().run_pending()
+    finally:
+        post_became_visible.disconnect(on_visible)
+    assert fired == [post.pk], (
+        "Убедитесь, что потеря отметки планировщика в кэше не пропускает"
+        " публикации."
+    )
@@ -0,0 +1,75 @@
+import atexit
+import logging
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_fingerprint_normalizes_literals():
+    from blog.queries import fingerprint
+
+    assert fingerprint(
+        "SELECT *  FROM t WHERE a = 'x' AND b IN (%s, %s,%s) LIMIT 10"
+    ) == "SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?"
+
+
+def test_slow_queries_are_logged_with_plan(
+        client, settings, caplog, post_with_published_location
+):
+    settings.BLOG_SLOW_QUERY_THRESHOLD_MS = 0
+    with caplog.at_level(logging.WARNING, logger="blog.slow_queries"):
+        client.get(f"/posts/{post_with_published_location.id}/")
+    records = [
+        record for record in caplog.records
+        if record.name == "blog.slow_queries"
+    ]
+    assert records, "Убедитесь, что медленные запросы попадают в лог."
+    record = next(
+        record for record in records if "blog_post" in record.sql
+    )
+    assert record.view == "blog:post_detail"
+    assert "%s" not in record.fingerprint
+    assert record.plan, (
+        "Убедитесь, что к медленному запросу прикладывается EXPLAIN."
+    )
+
+
+def test_fast_queries_are_not_logged(
+        client, settings, caplog, post_with_published_location
+):
+    settings.BLOG_SLOW_QUERY_THRESHOLD_MS = 60_000
+    with caplog.at_level(logging.WARNING, logger="blog.slow_queries"):
+        client.get(f"/posts/{post_with_published_location.id}/")
+    assert not [
+        record for record in caplog.records
+        if record.name == "blog.slow_queries"
+    ]
+
+
+def test_log_file_is_opened_on_first_slow_query(
+        client, settings, monkeypatch, tmp_path, post_with_published_location
+):
+    from blog import queries
+
+    monkeypatch.setattr(queries, "_listener", None)
+    monkeypatch.setattr(queries.logger, "handlers", [])
+    settings.BLOG_SLOW_QUERY_LOG = tmp_path / "logs" / "slow_queries.log"
+    url = f"/posts/{post_with_published_location.id}/"
+
+    settings.BLOG_SLOW_QUERY_THRESHOLD_MS = 60_000
+    client.get(url)
+    assert queries._listener is None, (
+        "Убедитесь, что поток записи лога запускается только при первом"
+        " медленном запросе."
+    )
+
+    settings.BLOG_SLOW_QUERY_THRESHOLD_MS = 0
+    client.get(url)
+    listener = queries._listener
+    assert listener is not None
+    atexit.unregister(listener.stop)
+    listener.stop()
+    assert "blog_post" in settings.BLOG_SLOW_QUERY_LOG.read_text(
+        encoding="utf-8"
+    )
@@ -0,0 +1,84 @@
+import gzip
+import json
+from http import HTTPStatus
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+
+@pytest.fixture
+def built_static(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command("build_static", verbosity=0)
+    return tmp_path
+
+
+def read(response):
+    return b"".join(response.streaming_content)
+
+
+def test_build_writes_hashed_compressed_files(built_static):
+    manifest = json.loads((built_static / "staticfiles.json").read_text())
+    hashed = manifest["paths"]["css/bootstrap.min.css"]
+    assert hashed != "css/bootstrap.min.css", (
+        "Убедитесь, что в имена файлов добавляется хэш содержимого."
+    )
+    assert "gzip" in manifest["encodings"][hashed]
+    original = (built_static / hashed).read_bytes()
+    assert gzip.decompress(
+        (built_static / f"{hashed}.gz").read_bytes()
+    ) == original
+    assert not any(
+        name.startswith("img/logo.") for name in manifest["encodings"]
+    ), "Убедитесь, что уже сжатые картинки не сжимаются повторно."
+
+
+@pytest.mark.django_db
+def test_pages_link_hashed_static(client, built_static):
+    content = client.get("/").content.decode()
+    url = staticfiles_storage.url("css/bootstrap.min.css")
+    assert url != "/static/css/bootstrap.min.css"
+    assert f'href="{url}"' in content
+
+
+def test_precompressed_variant_is_picked_by_accept_encoding(
+        client, built_static
+):
+    url = staticfiles_storage.url("css/bootstrap.min.css")
+    original = (built_static / url[len("/static/"):]).read_bytes()
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="br;q=0, gzip, deflate")
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"].startswith("text/css")
+    assert response["Vary"] == "Accept-Encoding"
+    assert "immutable" in response["Cache-Control"]
+    assert gzip.decompress(read(response)) == original
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert "Content-Encoding" not in response
+    assert read(response) == original
+
+    response = client.get("/static/css/bootstrap.min.css")
+    assert "immutable" not in response["Cache-Control"], (
+        "Убедитесь, что файлы без хэша в имени не кэшируются навсегда."
+    )
+
+
+def test_wildcard_does_not_override_rejected_encoding(client, built_static):
+    url = staticfiles_storage.url("css/bootstrap.min.css")
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0, *")
+    assert response.get("Content-Encoding") != "gzip", (
+        "Убедитесь, что `*` не отменяет явный запрет gzip;q=0."
+    )
+
+
+def test_nginx_chooses_precompressed_variant(client, settings, built_static):
+    settings.BLOG_MEDIA_ACCEL = "x-accel-redirect"
+    url = staticfiles_storage.url("css/bootstrap.min.css")
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["X-Accel-Redirect"] == (
+        settings.BLOG_STATIC_ACCEL_PREFIX + url[len("/static/"):]
+    ), "Убедитесь, что nginx получает несжатое имя файла."
+    assert "Content-Encoding" not in response